@@ -1,15 +1,49 @@
-import copy
+import asyncio
+import hashlib
+import heapq
 import json
 import pathlib
+import re
+import sqlite3
+import threading
 import time
+import unicodedata
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from email.utils import parsedate_to_datetime
+from queue import Empty, Queue
+from typing import Any, Callable, Iterator, Optional
 
+import aiohttp
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
 MAX_TEXT_LENGTH = 2000
+MAX_TRANSLATION_SEGMENTS = 128
+MAX_CHUNK_LENGTH = 1000
+MAX_TRANSLATION_BYTES = 100000
+MAX_TRANSLATION_MEMORY_SIZE = 64 * 1024 * 1024
+DEFAULT_WORKER_COUNT = 4
+DEFAULT_TRANSLATION_WORKER_COUNT = 2
+DEFAULT_ROOT_WORKER_COUNT = 2
+PIPELINE_QUEUE_SIZE = 256
+ASYNC_CONCURRENCY = 100
+MAX_BACKOFF_SECONDS = 120
+DEFAULT_POLLING_INTERVAL = 30
+MIN_POLLING_INTERVAL = 5
+DEFAULT_DEBOUNCE_SECONDS = 15
+MAX_POLLING_INTERVAL = 600
+TRANSLATION_BATCH_WAIT = 0.2
+MAX_RETRIES = 20
+REMOVAL_PROGRESS_INTERVAL = 100
+CHECKPOINT_INTERVAL = 30
+NOTION_REQUESTS_PER_SECOND = 3
+NOTION_BURST_SIZE = 10
+GOOGLE_REQUESTS_PER_SECOND = 10
+GOOGLE_BURST_SIZE = 20
 COMPLETION_MARK = "⚐"
+DEFAULT_TRANSLATION_LAYOUT = "child"
 
 INLINE_TYPES = (
     "heading_1",
@@ -35,33 +69,2529 @@ ALLOWED_HTTP_METHODS = (
     "DELETE",
     "PATCH",
 )
+COPIED_BLOCK_PROPERTIES = (
+    "color",
+    "checked",
+    "icon",
+)
+SCRIPT_RANGES = {
+    "latin": ((0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)),
+    "cyrillic": ((0x0400, 0x052F),),
+    "hangul": ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)),
+    "kana": ((0x3040, 0x30FF), (0x31F0, 0x31FF)),
+    "han": ((0x3400, 0x4DBF), (0x4E00, 0x9FFF)),
+}
+LANGUAGE_SCRIPTS = {
+    "en": ("latin",),
+    "de": ("latin",),
+    "es": ("latin",),
+    "fr": ("latin",),
+    "it": ("latin",),
+    "pt": ("latin",),
+    "ru": ("cyrillic",),
+    "uk": ("cyrillic",),
+    "ko": ("hangul",),
+    "ja": ("kana", "han"),
+    "jp": ("kana", "han"),
+    "zh": ("han",),
+}
+PIPELINE_STOP = object()
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+UNTRANSLATABLE_PATTERN = re.compile(
+    r"(https?://|www\.)\S+"
+    r"|[\w.+-]+@[\w-]+\.[\w.-]+"
+    r"|(?=\S*(?:_|\.\w)|\S*[a-z][A-Z])[A-Za-z_]\w*(\.\w+)*(\(\))?"
+)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second: float, burst_size: int):
+        self.requests_per_second = requests_per_second
+        self.burst_size = burst_size
+        self.tokens = float(burst_size)
+        self.updated_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        # Takes a token and returns zero, or returns how long to wait for one
+        with self.lock:
+            now = time.monotonic()
+            elapsed = max(0.0, now - self.updated_time)
+            self.tokens = min(
+                float(self.burst_size),
+                self.tokens + elapsed * self.requests_per_second,
+            )
+            self.updated_time = max(now, self.updated_time)
+            if now >= self.updated_time and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return max(
+                self.updated_time - now,
+                (1 - self.tokens) / self.requests_per_second,
+            )
+
+    def acquire(self):
+        # Blocks until a token is available, shared by every calling thread
+        while True:
+            wait_seconds = self.try_acquire()
+            if wait_seconds <= 0:
+                return
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self):
+        # Same as acquire, but only suspends the calling coroutine
+        while True:
+            wait_seconds = self.try_acquire()
+            if wait_seconds <= 0:
+                return
+            await asyncio.sleep(wait_seconds)
+
+    def pause(self, seconds: float):
+        # Empties the bucket and holds refilling until the server allows it
+        with self.lock:
+            resume_time = time.monotonic() + seconds
+            self.tokens = 0.0
+            self.updated_time = max(self.updated_time, resume_time)
+
+
+class TranslationMemory:
+    def __init__(self, database_path: str, max_size: int = MAX_TRANSLATION_MEMORY_SIZE):
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                source_language TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_language, target_language, text_hash)
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_last_used"
+            " ON translations (last_used)"
+        )
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_text_hash(text: str):
+        # Collapse whitespace so that cosmetic edits don't miss the cache
+        normalized_text = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha256(normalized_text.encode("utf8")).hexdigest()
+
+    def get_many(
+        self,
+        texts: list[str],
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ) -> list[Optional[str]]:
+        translations: list[Optional[str]] = []
+        with self.lock:
+            for text in texts:
+                text_hash = self.get_text_hash(text)
+                row = self.connection.execute(
+                    "SELECT translation FROM translations"
+                    " WHERE source_language = ? AND target_language = ?"
+                    " AND text_hash = ?",
+                    (source_language or "", target_language or "", text_hash),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    translations.append(None)
+                    continue
+                self.hits += 1
+                self.connection.execute(
+                    "UPDATE translations SET last_used = ?"
+                    " WHERE source_language = ? AND target_language = ?"
+                    " AND text_hash = ?",
+                    (
+                        time.time(),
+                        source_language or "",
+                        target_language or "",
+                        text_hash,
+                    ),
+                )
+                translations.append(row[0])
+            self.connection.commit()
+        return translations
+
+    def put_many(
+        self,
+        texts: list[str],
+        translations: list[str],
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ):
+        with self.lock:
+            for text, translation in zip(texts, translations):
+                text_hash = self.get_text_hash(text)
+                size = len(text_hash) + len(translation.encode("utf8"))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        source_language or "",
+                        target_language or "",
+                        text_hash,
+                        translation,
+                        size,
+                        time.time(),
+                    ),
+                )
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        # Drop the least recently used entries until the size limit is met
+        total_size = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM translations"
+        ).fetchone()[0]
+        excess_size = total_size - self.max_size
+        if excess_size <= 0:
+            return
+        rows = self.connection.execute(
+            "SELECT rowid, size FROM translations ORDER BY last_used"
+        )
+        evicted_rowids: list[tuple[int]] = []
+        for rowid, size in rows:
+            if excess_size <= 0:
+                break
+            evicted_rowids.append((rowid,))
+            excess_size -= size
+        self.connection.executemany(
+            "DELETE FROM translations WHERE rowid = ?", evicted_rowids
+        )
+
+    def print_stats(self):
+        print(f"Translation memory had {self.hits} hits and {self.misses} misses\n")
+
+
+class BlockMirror:
+    def __init__(self, database_path: str):
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blocks (
+                id TEXT PRIMARY KEY,
+                parent_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                rich_text TEXT,
+                last_edited_time TEXT NOT NULL,
+                has_children INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS blocks_parent_id"
+            " ON blocks (parent_id, position)"
+        )
+        # A listing is valid as long as its parent's last_edited_time matches
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS listings (
+                parent_id TEXT PRIMARY KEY,
+                last_edited_time TEXT NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_children(
+        self,
+        parent_id: str,
+        last_edited_time: str,
+    ) -> Optional[list[dict[str, Any]]]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT last_edited_time FROM listings WHERE parent_id = ?",
+                (parent_id,),
+            ).fetchone()
+            if row is None or row[0] != last_edited_time:
+                self.misses += 1
+                return None
+            self.hits += 1
+            rows = self.connection.execute(
+                "SELECT data FROM blocks WHERE parent_id = ? ORDER BY position",
+                (parent_id,),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def put_children(
+        self,
+        parent_id: str,
+        last_edited_time: str,
+        blocks: list[dict[str, Any]],
+    ):
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM blocks WHERE parent_id = ?",
+                (parent_id,),
+            )
+            for position, block in enumerate(blocks):
+                type_object = block.get(block["type"], {})
+                rich_text = type_object.get("rich_text")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        block["id"],
+                        parent_id,
+                        position,
+                        block["type"],
+                        None if rich_text is None else json.dumps(rich_text),
+                        block["last_edited_time"],
+                        int(block.get("has_children", False)),
+                        json.dumps(block),
+                    ),
+                )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO listings VALUES (?, ?)",
+                (parent_id, last_edited_time),
+            )
+            self.connection.commit()
+
+    def invalidate(self, parent_id: str):
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM listings WHERE parent_id = ?",
+                (parent_id,),
+            )
+            self.connection.commit()
+
+    def invalidate_parent(self, block_id: str):
+        # Drops the listing that contains the block, since it is now outdated
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT parent_id FROM blocks WHERE id = ?",
+                (block_id,),
+            ).fetchone()
+            if row is not None:
+                self.connection.execute(
+                    "DELETE FROM listings WHERE parent_id = ?",
+                    (row[0],),
+                )
+                self.connection.commit()
+
+    def print_stats(self):
+        print(f"Block mirror had {self.hits} hits and {self.misses} misses\n")
+
+
+class TranslationStateStore:
+    def __init__(self, database_path: str):
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        # States from before languages were recorded can't tell them apart
+        self.connection.execute("DROP TABLE IF EXISTS states")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS language_states (
+                block_id TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                source_hash TEXT NOT NULL,
+                block_edited_time TEXT NOT NULL,
+                translation_block_id TEXT NOT NULL,
+                translation_block_type TEXT NOT NULL,
+                translated_text TEXT NOT NULL,
+                PRIMARY KEY (block_id, target_language)
+            )
+            """
+        )
+        self.connection.commit()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_text_hash(text: str):
+        return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+    def get(
+        self,
+        block_id: str,
+        target_language: str,
+    ) -> Optional[tuple[str, str, str, str, str]]:
+        with self.lock:
+            return self.connection.execute(
+                "SELECT source_hash, block_edited_time, translation_block_id,"
+                " translation_block_type, translated_text"
+                " FROM language_states WHERE block_id = ? AND target_language = ?",
+                (block_id, target_language),
+            ).fetchone()
+
+    def put(
+        self,
+        block_id: str,
+        target_language: str,
+        source_text: str,
+        block_edited_time: str,
+        translation_block_id: str,
+        translation_block_type: str,
+        translated_text: str,
+    ):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO language_states VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    block_id,
+                    target_language,
+                    self.get_text_hash(source_text),
+                    block_edited_time,
+                    translation_block_id,
+                    translation_block_type,
+                    translated_text,
+                ),
+            )
+            self.connection.commit()
+
+    def delete(self, block_id: str, target_language: Optional[str] = None):
+        # Without a language, the states of every language are deleted
+        with self.lock:
+            if target_language is None:
+                self.connection.execute(
+                    "DELETE FROM language_states WHERE block_id = ?",
+                    (block_id,),
+                )
+            else:
+                self.connection.execute(
+                    "DELETE FROM language_states"
+                    " WHERE block_id = ? AND target_language = ?",
+                    (block_id, target_language),
+                )
+            self.connection.commit()
+
+
+class WriteSuppressor:
+    def __init__(self):
+        self.rich_text_hashes: dict[str, str] = {}
+        self.titles: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.skipped_count = 0
+
+    @staticmethod
+    def get_rich_text_hash(block_type: str, rich_text: list[dict[str, Any]]):
+        # Fields that Notion fills in by itself are left out of the comparison
+        items: list[Any] = [block_type]
+        for item in NotionClient.get_minimal_rich_text(rich_text):
+            content = item[item["type"]]
+            if item["type"] == "text":
+                content = {"content": content["content"], "link": content.get("link")}
+            items.append([item["type"], content, item.get("annotations")])
+        encoded = json.dumps(items, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(encoded.encode("utf8")).hexdigest()
+
+    def remember_block(self, block: dict[str, Any]):
+        block_type = block.get("type")
+        if block_type == "child_page":
+            title = NotionClient.get_listed_title(block)
+            if title is not None:
+                self.remember_title(block["id"], title)
+        elif block_type in RICH_TEXT_TYPES:
+            rich_text = block[block_type]["rich_text"]
+            rich_text_hash = self.get_rich_text_hash(block_type, rich_text)
+            with self.lock:
+                self.rich_text_hashes[block["id"]] = rich_text_hash
+
+    def remember_title(self, page_id: str, title: str):
+        with self.lock:
+            self.titles[page_id] = title
+
+    def forget(self, block_id: str):
+        with self.lock:
+            self.rich_text_hashes.pop(block_id, None)
+            self.titles.pop(block_id, None)
+
+    def is_rich_text_known(
+        self,
+        block_id: str,
+        block_type: str,
+        rich_text: list[dict[str, Any]],
+    ):
+        rich_text_hash = self.get_rich_text_hash(block_type, rich_text)
+        with self.lock:
+            if self.rich_text_hashes.get(block_id) != rich_text_hash:
+                return False
+            self.skipped_count += 1
+            return True
+
+    def is_title_known(self, page_id: str, title: str):
+        with self.lock:
+            if self.titles.get(page_id) != title:
+                return False
+            self.skipped_count += 1
+            return True
+
+    def pop_skipped_count(self):
+        with self.lock:
+            skipped_count = self.skipped_count
+            self.skipped_count = 0
+            return skipped_count
+
+
+def get_retry_seconds(retry_after: Optional[str]) -> float:
+    # Retry-After holds either seconds or an HTTP date, and anything
+    # unreadable falls back to a short wait
+    if retry_after is None:
+        return 1.0
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_time = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return 1.0
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+    return max((retry_time - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def send_sync(
+    session: requests.Session,
+    rate_limiter: RateLimiter,
+    method: str,
+    url: str,
+    **kwargs: Any,
+) -> requests.Response:
+    # Rate limited responses are retried here instead of inside urllib3,
+    # so that the shared limiter can hold back every other thread too
+    for _ in range(MAX_RETRIES):
+        rate_limiter.acquire()
+        raw_response = session.request(method, url, **kwargs)
+        if raw_response.status_code != 429:
+            return raw_response
+        retry_after = raw_response.headers.get("Retry-After")
+        rate_limiter.pause(get_retry_seconds(retry_after))
+    rate_limiter.acquire()
+    return session.request(method, url, **kwargs)
+
+
+class TranslatorClient:
+    def __init__(
+        self,
+        google_cloud_api_key: str,
+        translation_memory: Optional[TranslationMemory] = None,
+        pool_size: int = DEFAULT_WORKER_COUNT,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.default_headers = {
+            "Content-type": "application/json",
+        }
+
+        self.session = requests.Session()
+        self.session.headers.update(self.default_headers)
+        retry = Retry(
+            total=MAX_RETRIES,
+            backoff_factor=1,
+            allowed_methods=ALLOWED_HTTP_METHODS,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(GOOGLE_REQUESTS_PER_SECOND, GOOGLE_BURST_SIZE)
+        self.rate_limiter = rate_limiter
+
+        self.google_cloud_api_key = google_cloud_api_key
+        self.translation_memory = translation_memory
+
+        # Identical texts requested by several threads at once share one call
+        self.in_flight: dict[tuple[Optional[str], Optional[str], str], Future[str]] = {}
+        self.in_flight_lock = threading.Lock()
+        self.coalesced_count = 0
+
+    def send(self, method: str, url: str, **kwargs: Any):
+        return send_sync(self.session, self.rate_limiter, method, url, **kwargs)
+
+    def translate(
+        self,
+        text: str,
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ):
+        return self.translate_many([text], source_language, target_language)[0]
+
+    def translate_many(
+        self,
+        texts: list[str],
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ) -> list[str]:
+        if self.translation_memory is None:
+            remembered: list[Optional[str]] = [None] * len(texts)
+        else:
+            remembered = self.translation_memory.get_many(
+                texts,
+                source_language,
+                target_language,
+            )
+        missing_texts = [t for t, r in zip(texts, remembered) if r is None]
+
+        own_texts: list[str] = []
+        own_futures: list[Future[str]] = []
+        missing_futures: list[Future[str]] = []
+        with self.in_flight_lock:
+            for text in missing_texts:
+                key = (source_language, target_language, text)
+                future = self.in_flight.get(key)
+                if future is None:
+                    future = Future[str]()
+                    self.in_flight[key] = future
+                    own_texts.append(text)
+                    own_futures.append(future)
+                else:
+                    self.coalesced_count += 1
+                missing_futures.append(future)
+
+        try:
+            own_fetched: list[str] = []
+            for batch in self.split_into_batches(own_texts):
+                own_fetched += self.translate_batch(
+                    batch,
+                    source_language,
+                    target_language,
+                )
+            if self.translation_memory is not None and own_texts:
+                self.translation_memory.put_many(
+                    own_texts,
+                    own_fetched,
+                    source_language,
+                    target_language,
+                )
+        except Exception as error:
+            # Threads waiting on these texts receive the same error
+            with self.in_flight_lock:
+                for text, future in zip(own_texts, own_futures):
+                    del self.in_flight[(source_language, target_language, text)]
+                    future.set_exception(error)
+            raise
+        with self.in_flight_lock:
+            for text, future, translation in zip(own_texts, own_futures, own_fetched):
+                del self.in_flight[(source_language, target_language, text)]
+                future.set_result(translation)
+        fetched = [future.result() for future in missing_futures]
+
+        # Merge remembered and fetched translations back into input order
+        fetched_iterator = iter(fetched)
+        translations: list[str] = []
+        for translation in remembered:
+            if translation is None:
+                translation = next(fetched_iterator)
+            translations.append(translation)
+        return translations
+
+    def pop_coalesced_count(self):
+        with self.in_flight_lock:
+            coalesced_count = self.coalesced_count
+            self.coalesced_count = 0
+            return coalesced_count
+
+    @staticmethod
+    def split_into_batches(texts: list[str]) -> list[list[str]]:
+        # Pack segments greedily while staying under the endpoint limits
+        batches: list[list[str]] = []
+        batch: list[str] = []
+        batch_bytes = 0
+        for text in texts:
+            text_bytes = len(text.encode("utf8"))
+            is_full = len(batch) >= MAX_TRANSLATION_SEGMENTS
+            is_too_large = batch_bytes + text_bytes > MAX_TRANSLATION_BYTES
+            if batch and (is_full or is_too_large):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+            batch.append(text)
+            batch_bytes += text_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def translate_batch(
+        self,
+        texts: list[str],
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ) -> list[str]:
+        url = "https://translation.googleapis.com/language/translate/v2"
+
+        # Specify Query Parameters
+        params = {
+            "format": "text",
+            "model": "base",
+            "key": self.google_cloud_api_key,
+        }
+
+        body = {
+            "q": texts,
+            "source": source_language,
+            "target": target_language,
+        }
+
+        # Send the request and get response
+        raw_response = self.send("POST", url, params=params, json=body)
+        try:
+            response = raw_response.json()
+        except Exception:
+            print(raw_response.request.headers)
+            print(texts)
+            print(raw_response.content)
+            raise ConnectionError
+
+        if raw_response.status_code != 200:
+            if len(texts) > 1:
+                # The batch was rejected as a whole, so retry it in halves
+                middle = len(texts) // 2
+                return self.translate_batch(
+                    texts[:middle], source_language, target_language
+                ) + self.translate_batch(
+                    texts[middle:], source_language, target_language
+                )
+            print(f"HTTP {raw_response.status_code}: {response['error']['details']}\n")
+
+        translations: list[str] = []
+        for text, item in zip(texts, response["data"]["translations"]):
+            translation: str = item["translatedText"]
+            print(f"{text}\n")
+            print(f"{translation}\n")
+            translations.append(translation)
+
+        # Return the translations in the order of the given texts
+        return translations
+
+
+def parse_time(time_text: str):
+    time_format = "%Y-%m-%dT%H:%M:%S.000Z"
+    parsed_time = datetime.strptime(time_text, time_format)
+    return parsed_time.replace(tzinfo=timezone.utc)
+
+
+def is_settled(last_edited_time: str):
+    # Notion rounds edit times down to the minute, so a timestamp is only
+    # final once that minute has passed
+    settled_time = parse_time(last_edited_time) + timedelta(minutes=1)
+    return settled_time <= datetime.now(timezone.utc)
+
+
+class NotionClient:
+    def __init__(
+        self,
+        notion_api_key: str,
+        pool_size: int = DEFAULT_WORKER_COUNT,
+        rate_limiter: Optional[RateLimiter] = None,
+        block_mirror: Optional[BlockMirror] = None,
+    ):
+        self.default_headers = {
+            "Authorization": f"Bearer {notion_api_key}",
+            "Content-Type": "application/json",
+            "Notion-Version": "2022-06-28",
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self.default_headers)
+        retry = Retry(
+            total=MAX_RETRIES,
+            backoff_factor=1,
+            allowed_methods=ALLOWED_HTTP_METHODS,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(NOTION_REQUESTS_PER_SECOND, NOTION_BURST_SIZE)
+        self.rate_limiter = rate_limiter
+        self.block_mirror = block_mirror
+        # Writes that would leave a block as it already is are skipped
+        self.write_suppressor = WriteSuppressor()
+
+    def send(self, method: str, url: str, **kwargs: Any):
+        return send_sync(self.session, self.rate_limiter, method, url, **kwargs)
+
+    def get_page(self, page_id: str):
+        url = f"https://api.notion.com/v1/pages/{page_id}"
+        raw_response = self.send("GET", url)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        return response
+
+    def refresh_page_block(self, block: dict[str, Any]):
+        # Mirrored child page blocks may be outdated, so their timestamp
+        # and title are read again from the page itself
+        page = self.get_page(block["id"])
+        block["last_edited_time"] = page.get("last_edited_time")
+        for page_property in page.get("properties", {}).values():
+            if page_property["type"] == "title":
+                title = self.get_text({"rich_text": page_property["title"]})
+                block["child_page"]["title"] = title
+                self.write_suppressor.remember_title(block["id"], title)
+
+    def get_property(self, page_id: str, property_id: str):
+        url = f"https://api.notion.com/v1/pages/{page_id}/properties/{property_id}"
+        raw_response = self.send("GET", url)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        return response
+
+    def get_title_text(self, page_id: str) -> str:
+        title_property = self.get_property(page_id, "title")["results"][0]
+        title = title_property["title"]["plain_text"]
+        self.write_suppressor.remember_title(page_id, title)
+        return title
+
+    def get_some_blocks(
+        self,
+        block_id: str,
+        start_cursor: Optional[str] = None,
+        page_size: Optional[str] = None,
+    ):
+        url = f"https://api.notion.com/v1/blocks/{block_id}/children"
+        params: dict[str, str] = {}
+        if start_cursor is not None:
+            params["start_cursor"] = start_cursor
+        if page_size is not None:
+            params["page_size"] = page_size
+        raw_response = self.send("GET", url, params=params)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        return response
+
+    def iter_blocks(
+        self,
+        block_id: str,
+        include_subpages: bool,
+        last_edited_time: Optional[str] = None,
+    ) -> Iterator[dict[str, Any]]:
+        # Yields blocks as soon as each paginated response arrives,
+        # reading unchanged listings from the mirror when there is one
+        parents: deque[tuple[str, Optional[str]]] = deque(
+            [(block_id, last_edited_time)]
+        )
+        while parents:
+            parent_id, parent_edited_time = parents.popleft()
+
+            # Edit times are rounded down to the minute, so a listing taken
+            # within that minute may miss later edits and is never mirrored
+            mirror_time = None
+            if parent_edited_time is not None and is_settled(parent_edited_time):
+                mirror_time = parent_edited_time
+            mirrored_blocks = None
+            if self.block_mirror is not None and mirror_time is not None:
+                mirrored_blocks = self.block_mirror.get_children(
+                    parent_id,
+                    mirror_time,
+                )
+            if mirrored_blocks is not None:
+                for block in mirrored_blocks:
+                    if block["type"] == "child_page":
+                        self.refresh_page_block(block)
+                        if include_subpages:
+                            parents.append((block["id"], block["last_edited_time"]))
+                    self.write_suppressor.remember_block(block)
+                    yield block
+                continue
+
+            listed_blocks: list[dict[str, Any]] = []
+            blocks_response = self.get_some_blocks(parent_id)
+            while True:
+                blocks = blocks_response.get("results")
+                if blocks is None:
+                    break
+                for block in blocks:
+                    if block["type"] == "child_page":
+                        if include_subpages:
+                            parents.append((block["id"], block["last_edited_time"]))
+                    listed_blocks.append(block)
+                    self.write_suppressor.remember_block(block)
+                    yield block
+                if not blocks_response.get("has_more"):
+                    if self.block_mirror is not None and mirror_time is not None:
+                        self.block_mirror.put_children(
+                            parent_id,
+                            mirror_time,
+                            listed_blocks,
+                        )
+                    break
+                blocks_response = self.get_some_blocks(
+                    parent_id, blocks_response.get("next_cursor")
+                )
+
+    def get_blocks(
+        self,
+        block_id: str,
+        include_subpages: bool,
+        last_edited_time: Optional[str] = None,
+    ) -> list[Any]:
+        blocks = list(self.iter_blocks(block_id, include_subpages, last_edited_time))
+        print(f"Found {len(blocks)} blocks\n")
+        return blocks
+
+    @staticmethod
+    def get_text(rich_text_object: dict[str, Any]):
+        # Concatenates a rich text array into plain text
+        text = ""
+        for rt in rich_text_object["rich_text"]:
+            text += rt["plain_text"]
+        return text
+
+    @staticmethod
+    def get_listed_title(block: dict[str, Any]) -> Optional[str]:
+        # Child page blocks carry their title, so no property GET is needed
+        title = block.get("child_page", {}).get("title")
+        if title is None or len(title) >= MAX_TEXT_LENGTH:
+            # The listed title may have been cut short, so it can't be trusted
+            return None
+        return title
+
+    @staticmethod
+    def get_block_text(block: dict[str, Any]):
+        if block["type"] in RICH_TEXT_TYPES:
+            return NotionClient.get_text(block[block["type"]])
+        else:
+            return ""
+
+    @staticmethod
+    def get_minimal_rich_text(rich_text: list[dict[str, Any]]):
+        # Keeps only what Notion needs to write rich text items back
+        minimal_rich_text: list[dict[str, Any]] = []
+        for item in rich_text:
+            minimal_item = {"type": item["type"], item["type"]: item[item["type"]]}
+            annotations = item.get("annotations", {})
+            if any(v for k, v in annotations.items() if k != "color") or (
+                annotations.get("color", "default") != "default"
+            ):
+                minimal_item["annotations"] = annotations
+            minimal_rich_text.append(minimal_item)
+        return minimal_rich_text
+
+    @staticmethod
+    def build_rich_text(text: str):
+        # Notion limits the length of each rich text item, not of the block
+        return [
+            {
+                "type": "text",
+                "text": {"content": text[start : start + MAX_TEXT_LENGTH]},
+            }
+            for start in range(0, len(text), MAX_TEXT_LENGTH)
+        ]
+
+    @staticmethod
+    def build_block(source_block: dict[str, Any], rich_text: list[dict[str, Any]]):
+        # Creates a block of the same type without copying the whole source
+        block_type = source_block["type"]
+        type_object: dict[str, Any] = {"rich_text": rich_text}
+        for key in COPIED_BLOCK_PROPERTIES:
+            if key in source_block[block_type]:
+                type_object[key] = source_block[block_type][key]
+        return {"object": "block", "type": block_type, block_type: type_object}
+
+    def update_rich_text(
+        self,
+        block_id: str,
+        block_type: str,
+        rich_text: list[dict[str, Any]],
+    ):
+        if self.write_suppressor.is_rich_text_known(block_id, block_type, rich_text):
+            return {"object": "block", "id": block_id, "type": block_type}
+        payload = {block_type: {"rich_text": rich_text}}
+        return self.update_block(block_id, payload)
+
+    def update_block(self, block_id: str, payload: dict[str, Any]):
+        if self.block_mirror is not None:
+            self.block_mirror.invalidate_parent(block_id)
+        url = f"https://api.notion.com/v1/blocks/{block_id}"
+        raw_response = self.send("PATCH", url, json=payload)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+            self.write_suppressor.forget(block_id)
+        else:
+            self.write_suppressor.remember_block(response)
+        return response
+
+    def delete_block(self, block_id: str):
+        if self.block_mirror is not None:
+            self.block_mirror.invalidate_parent(block_id)
+        self.write_suppressor.forget(block_id)
+        url = f"https://api.notion.com/v1/blocks/{block_id}"
+        raw_response = self.send("DELETE", url)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+
+    def append_block_children(self, block_id: str, payload: dict[str, Any]):
+        if self.block_mirror is not None:
+            self.block_mirror.invalidate(block_id)
+            self.block_mirror.invalidate_parent(block_id)
+        url = f"https://api.notion.com/v1/blocks/{block_id}/children"
+        raw_response = self.send("PATCH", url, json=payload)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        for block in response.get("results", []):
+            self.write_suppressor.remember_block(block)
+        return response
+
+    def update_title(self, page_id: str, title: str):
+        if self.write_suppressor.is_title_known(page_id, title):
+            return
+        if self.block_mirror is not None:
+            self.block_mirror.invalidate_parent(page_id)
+        url = f"https://api.notion.com/v1/pages/{page_id}"
+        payload = {
+            "properties": {"title": {"title": NotionClient.build_rich_text(title)}}
+        }
+        raw_response = self.send("PATCH", url, json=payload)
+        response = raw_response.json()
+        if raw_response.status_code != 200:
+            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+            self.write_suppressor.forget(page_id)
+        else:
+            self.write_suppressor.remember_title(page_id, title)
+
+
+class PipelineStage:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[list[Any]], None],
+        worker_count: int,
+        batch_size: int = 1,
+        batch_wait: float = 0.0,
+    ):
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue: Queue[Any] = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.processed_count = 0
+        self.max_queue_depth = 0
+        self.error: Optional[Exception] = None
+        self.start_time = time.monotonic()
+        self.finish_time = self.start_time
+        self.workers = [
+            threading.Thread(target=self.work, daemon=True) for _ in range(worker_count)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def put(self, item: Any):
+        # Blocks while the queue is full, which holds back the upstream stage
+        self.queue.put(item)
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def take_batch(self) -> tuple[list[Any], bool]:
+        items: list[Any] = []
+        item = self.queue.get()
+        while item is not PIPELINE_STOP:
+            items.append(item)
+            if len(items) >= self.batch_size:
+                return items, False
+            try:
+                item = self.queue.get(timeout=self.batch_wait)
+            except Empty:
+                return items, False
+        return items, True
+
+    def work(self):
+        while True:
+            items, is_stopped = self.take_batch()
+            # After a failure, items are still drained so producers never block
+            if items and self.error is None:
+                try:
+                    self.handler(items)
+                except Exception as error:
+                    with self.lock:
+                        if self.error is None:
+                            self.error = error
+            with self.lock:
+                self.processed_count += len(items)
+            if is_stopped:
+                return
+
+    def close(self):
+        for _ in self.workers:
+            self.queue.put(PIPELINE_STOP)
+        for worker in self.workers:
+            worker.join()
+        self.finish_time = time.monotonic()
+
+    def print_stats(self):
+        elapsed_seconds = max(self.finish_time - self.start_time, 0.001)
+        throughput = self.processed_count / elapsed_seconds
+        print(
+            f"{self.name} stage handled {self.processed_count} items"
+            f" at {throughput:.1f} items per second"
+            f" with queue depth up to {self.max_queue_depth}"
+        )
+
+
+class CycleStats:
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def add(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+            return self.counts[name]
+
+    def get(self, name: str):
+        with self.lock:
+            return self.counts.get(name, 0)
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+    def print_stats(self):
+        with self.lock:
+            if not self.counts:
+                return
+            for name, count in self.counts.items():
+                print(f"{name}: {count}")
+        print("")
+
+
+class PollingScheduler:
+    def __init__(
+        self,
+        minimum_interval: float = MIN_POLLING_INTERVAL,
+        maximum_interval: float = MAX_POLLING_INTERVAL,
+    ):
+        self.minimum_interval = minimum_interval
+        self.maximum_interval = maximum_interval
+        self.interval = min(DEFAULT_POLLING_INTERVAL, maximum_interval)
+
+    def get_delay(self, has_changes: bool, cycle_seconds: float):
+        # Polls quickly while edits are flowing and backs off while idle
+        if has_changes:
+            self.interval = self.minimum_interval
+        else:
+            self.interval = min(self.interval * 2, self.maximum_interval)
+        # The interval counts from the start of the cycle that just finished
+        return max(0.0, self.interval - cycle_seconds)
+
+
+class PendingTranslation:
+    def __init__(
+        self,
+        block: dict[str, Any],
+        source_text: str,
+        before_translation_children: Optional[dict[str, dict[str, Any]]] = None,
+        target_languages: Optional[list[str]] = None,
+    ):
+        # Existing translation blocks and translations are keyed by language
+        self.block = block
+        self.source_text = source_text
+        self.before_translation_children = before_translation_children or {}
+        self.target_languages = target_languages or []
+        self.translations: dict[str, str] = {}
+
+
+class PendingEdit:
+    def __init__(self, page_id: str, last_edited_time: str, source_text: str):
+        self.page_id = page_id
+        self.last_edited_time = last_edited_time
+        self.source_text = source_text
+        self.first_seen_time = time.monotonic()
+
+
+class PendingRemoval:
+    def __init__(
+        self,
+        block_id: str,
+        block_type: Optional[str] = None,
+        rich_text: Optional[list[dict[str, Any]]] = None,
+        title: Optional[str] = None,
+    ):
+        # Without new rich text or a new title, the block is deleted
+        self.block_id = block_id
+        self.block_type = block_type
+        self.rich_text = rich_text
+        self.title = title
+
+
+class ConversionCheckpoint:
+    def __init__(
+        self,
+        checkpoint_path: str,
+        page_id: str,
+        source_language: Optional[str],
+        target_languages: list[str],
+        translation_layout: str,
+    ):
+        self.checkpoint_path = pathlib.Path(checkpoint_path)
+        self.page_id = page_id
+        self.source_language = source_language
+        self.target_languages = target_languages
+        self.translation_layout = translation_layout
+        self.processed_block_ids: set[str] = set()
+        self.pending_writes: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.saved_time = time.monotonic()
+
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf8") as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return
+        if (
+            checkpoint.get("pageId") != page_id
+            or checkpoint.get("sourceLanguage") != source_language
+            or checkpoint.get("targetLanguages") != target_languages
+            or checkpoint.get("translationLayout") != translation_layout
+        ):
+            # A checkpoint of another page or other languages can't be resumed
+            return
+        self.processed_block_ids = set(checkpoint["processedBlockIds"])
+        self.pending_writes = checkpoint["pendingWrites"]
+        print(
+            f"Resuming from a checkpoint with {len(self.processed_block_ids)}"
+            f" processed blocks and {len(self.pending_writes)} pending writes\n"
+        )
+
+    @staticmethod
+    def encode_pending(pending: PendingTranslation):
+        return {
+            "block": pending.block,
+            "sourceText": pending.source_text,
+            "beforeTranslationChildren": pending.before_translation_children,
+            "targetLanguages": pending.target_languages,
+            "translations": pending.translations,
+        }
+
+    @staticmethod
+    def decode_pending(encoded: dict[str, Any]):
+        pending = PendingTranslation(
+            encoded["block"],
+            encoded["sourceText"],
+            encoded["beforeTranslationChildren"],
+            encoded["targetLanguages"],
+        )
+        pending.translations = encoded["translations"]
+        return pending
+
+    def is_processed(self, block_id: str):
+        # Blocks with a pending write are finished by replaying that write
+        with self.lock:
+            return (
+                block_id in self.processed_block_ids or block_id in self.pending_writes
+            )
+
+    def mark_processed(self, block_id: str):
+        with self.lock:
+            self.processed_block_ids.add(block_id)
+            self.pending_writes.pop(block_id, None)
+        self.save_if_due()
+
+    def add_pending_write(self, pending: PendingTranslation):
+        # Translated but unwritten blocks are kept, so that a resumed run
+        # writes them without translating again
+        encoded = self.encode_pending(pending)
+        with self.lock:
+            self.pending_writes[pending.block["id"]] = encoded
+        self.save_if_due()
+
+    def get_pending_writes(self):
+        with self.lock:
+            encoded_pendings = list(self.pending_writes.values())
+        return [self.decode_pending(encoded) for encoded in encoded_pendings]
+
+    def save_if_due(self):
+        with self.lock:
+            if time.monotonic() - self.saved_time < CHECKPOINT_INTERVAL:
+                return
+            self.saved_time = time.monotonic()
+        self.save()
+
+    def save(self):
+        with self.lock:
+            checkpoint = {
+                "pageId": self.page_id,
+                "sourceLanguage": self.source_language,
+                "targetLanguages": self.target_languages,
+                "translationLayout": self.translation_layout,
+                "processedBlockIds": list(self.processed_block_ids),
+                "pendingWrites": dict(self.pending_writes),
+            }
+        with self.save_lock:
+            # Writing to a temporary file first keeps the old checkpoint
+            # intact if the process dies in the middle
+            temporary_path = self.checkpoint_path.with_suffix(".tmp")
+            with open(temporary_path, "w", encoding="utf8") as file:
+                json.dump(checkpoint, file)
+            temporary_path.replace(self.checkpoint_path)
+
+    def delete(self):
+        with self.save_lock:
+            self.checkpoint_path.unlink(missing_ok=True)
+
+
+class Converter:
+    def __init__(
+        self,
+        source_language: Optional[str],
+        target_language: Optional[str],
+        google_cloud_api_key: str,
+        notion_api_key: str,
+        translation_memory_path: Optional[str] = None,
+        fetch_worker_count: int = DEFAULT_WORKER_COUNT,
+        translation_worker_count: int = DEFAULT_TRANSLATION_WORKER_COUNT,
+        write_worker_count: int = DEFAULT_WORKER_COUNT,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        block_mirror_path: Optional[str] = None,
+        translation_state_path: Optional[str] = None,
+        translation_layout: str = DEFAULT_TRANSLATION_LAYOUT,
+        additional_target_languages: Optional[list[str]] = None,
+        notion_client: Optional[NotionClient] = None,
+        translate_client: Optional[TranslatorClient] = None,
+        checkpoint_path: Optional[str] = None,
+    ):
+        # Clients can be shared between converters, so that they all
+        # draw from the same connection pools and rate limits
+        self.is_notion_client_shared = notion_client is not None
+        self.is_translate_client_shared = translate_client is not None
+        if notion_client is None:
+            if block_mirror_path is None:
+                block_mirror = None
+            else:
+                block_mirror = BlockMirror(block_mirror_path)
+            notion_client = NotionClient(
+                notion_api_key,
+                fetch_worker_count + write_worker_count,
+                block_mirror=block_mirror,
+            )
+        self.notion_client = notion_client
+        if translate_client is None:
+            if translation_memory_path is None:
+                translation_memory = None
+            else:
+                translation_memory = TranslationMemory(translation_memory_path)
+            translate_client = TranslatorClient(
+                google_cloud_api_key,
+                translation_memory,
+                translation_worker_count,
+            )
+        self.translate_client = translate_client
+        self.checkpoint_path = checkpoint_path
+        if translation_state_path is None:
+            self.translation_state = None
+        else:
+            self.translation_state = TranslationStateStore(translation_state_path)
+        self.source_language = source_language
+        # Every block is translated into all target languages in one pass
+        self.target_languages: list[str] = []
+        if target_language is not None:
+            self.target_languages = [target_language]
+            self.target_languages += additional_target_languages or []
+        self.fetch_worker_count = fetch_worker_count
+        self.translation_worker_count = translation_worker_count
+        self.write_worker_count = write_worker_count
+        self.cycle_stats = CycleStats()
+
+        # Realtime mode remembers what it has already seen between cycles
+        self.page_watermarks: dict[str, str] = {}
+        self.block_watermarks: dict[str, str] = {}
+        self.listed_subpages: dict[str, list[str]] = {}
+        self.next_page_watermarks: dict[str, str] = {}
+        self.next_block_watermarks: dict[str, str] = {}
+
+        # Blocks under active editing wait here until they stop changing
+        self.debounce_seconds = debounce_seconds
+        self.pending_edits: dict[str, PendingEdit] = {}
+        self.seen_block_ids: set[str] = set()
+
+        # Translations are either children of their source blocks,
+        # or siblings placed right after them
+        self.translation_layout = translation_layout
+        self.translation_siblings: dict[str, list[dict[str, Any]]] = {}
+
+        # Identical source texts are translated only once in each cycle
+        self.cycle_translations: dict[tuple[str, str], str] = {}
+
+    @staticmethod
+    def is_recently_edited(block: dict[str, Any]):
+        last_edited_time = parse_time(block["last_edited_time"])
+        return last_edited_time + timedelta(minutes=5) >= datetime.now(timezone.utc)
+
+    @staticmethod
+    def get_script(character: str):
+        code_point = ord(character)
+        for script, ranges in SCRIPT_RANGES.items():
+            for start, end in ranges:
+                if start <= code_point <= end:
+                    return script
+        return None
+
+    def is_untranslatable(self, text: str):
+        # Numbers, dates, emoji, links, identifiers and texts already written
+        # in the target script would come back unchanged from Google
+        letters = [c for c in text if unicodedata.category(c).startswith("L")]
+        is_skipped = not letters or bool(UNTRANSLATABLE_PATTERN.fullmatch(text))
+
+        target_scripts = None
+        if len(self.target_languages) == 1:
+            target_scripts = LANGUAGE_SCRIPTS.get(self.target_languages[0])
+        source_scripts = LANGUAGE_SCRIPTS.get(self.source_language or "")
+        if (
+            not is_skipped
+            and target_scripts is not None
+            and source_scripts is not None
+            and not set(source_scripts) & set(target_scripts)
+        ):
+            # Only a known source in another script tells that text written
+            # in the target script is already translated
+            is_skipped = all(self.get_script(c) in target_scripts for c in letters)
+
+        if is_skipped:
+            self.cycle_stats.add("Skipped untranslatable segments")
+            self.cycle_stats.add("Skipped untranslatable characters", len(text))
+        return is_skipped
+
+    @staticmethod
+    def get_mark_text(target_language: str):
+        # Every translation names its language right after the marker
+        return f" {COMPLETION_MARK}{target_language} "
+
+    @staticmethod
+    def parse_translation_text(
+        translation_text: str,
+    ) -> tuple[Optional[str], int]:
+        # Reads the language and the source text length after the marker,
+        # where an untagged marker comes from before languages were written
+        mark_tail = translation_text.split(COMPLETION_MARK)[-1]
+        splitted_texts = mark_tail.split()
+        if mark_tail[:1].isspace():
+            return None, int(splitted_texts[0])
+        return splitted_texts[0], int(splitted_texts[1])
+
+    def get_missing_languages(self, marked_text: str):
+        # Languages already written after a marker are kept, and an untagged
+        # marker stands for the first language as before languages were tagged
+        written_languages: set[str] = set()
+        for tag in re.findall(f"{COMPLETION_MARK}(\\S*)", marked_text):
+            written_languages.add(tag or self.target_languages[0])
+        return [
+            target_language
+            for target_language in self.target_languages
+            if target_language not in written_languages
+        ]
+
+    @staticmethod
+    def get_source_title(title: str):
+        # The source title follows the last marker and its language tag
+        mark_tail = title.split(COMPLETION_MARK)[-1]
+        if not mark_tail[:1].isspace():
+            mark_tail = mark_tail.partition(" ")[2]
+        return mark_tail.strip()
+
+    def plan_translation(
+        self,
+        block: dict[str, Any],
+        source_text: str,
+        translation_blocks: list[dict[str, Any]],
+    ):
+        # Only languages without an up-to-date translation are written,
+        # and extra translations in the same language are deleted
+        before_translation_children: dict[str, dict[str, Any]] = {}
+        before_source_text_lengths: dict[str, int] = {}
+        legacy_translation_blocks: list[dict[str, Any]] = []
+        for translation_block in translation_blocks:
+            translation_text = self.notion_client.get_block_text(translation_block)
+            target_language, source_text_length = self.parse_translation_text(
+                translation_text
+            )
+            if target_language is None:
+                legacy_translation_blocks.append(translation_block)
+                continue
+            if target_language in before_translation_children:
+                self.notion_client.delete_block(translation_block["id"])
+                continue
+            before_translation_children[target_language] = translation_block
+            before_source_text_lengths[target_language] = source_text_length
+
+        # An untagged translation's language is unknown, so it is only reused
+        # as a slot for the first language, which is translated again to tag it
+        first_language = self.target_languages[0]
+        if legacy_translation_blocks and first_language not in (
+            before_translation_children
+        ):
+            before_translation_children[first_language] = legacy_translation_blocks[0]
+
+        target_languages = [
+            target_language
+            for target_language in self.target_languages
+            if before_source_text_lengths.get(target_language) != len(source_text)
+        ]
+        if not target_languages:
+            return None
+        return PendingTranslation(
+            block,
+            source_text,
+            before_translation_children,
+            target_languages,
+        )
+
+    def plan_children_listing(self, block: dict[str, Any]):
+        # Decides from the listing metadata whether the children GET is needed
+        if block["type"] in INLINE_TYPES:
+            return False
+        if not block.get("has_children", True):
+            # Without children there can't be an existing translation child
+            self.cycle_stats.add("Skipped children listings")
+            return False
+        return True
+
+    def is_debounced(self, block: dict[str, Any], source_text: str):
+        # A block is translated only after it has stopped changing for a while
+        last_edited_time = block["last_edited_time"]
+        pending_edit = self.pending_edits.get(block["id"])
+        if (
+            pending_edit is None
+            or pending_edit.last_edited_time != last_edited_time
+            or pending_edit.source_text != source_text
+        ):
+            # Edit times are rounded down to the minute, so an edit older than
+            # that minute plus the window is already known to be stable
+            stable_time = parse_time(last_edited_time) + timedelta(
+                minutes=1, seconds=self.debounce_seconds
+            )
+            if stable_time <= datetime.now(timezone.utc):
+                self.pending_edits.pop(block["id"], None)
+                return True
+            page_id = block["parent"].get("page_id", "")
+            self.pending_edits[block["id"]] = PendingEdit(
+                page_id,
+                last_edited_time,
+                source_text,
+            )
+            self.cycle_stats.add("Debounced blocks")
+            return False
+        if time.monotonic() - pending_edit.first_seen_time < self.debounce_seconds:
+            self.cycle_stats.add("Debounced blocks")
+            return False
+        del self.pending_edits[block["id"]]
+        return True
+
+    def prune_pending_edits(self):
+        # Blocks that were deleted, moved away, or left the realtime window
+        # would otherwise stay pending and hold their pages back forever
+        window_start = datetime.now(timezone.utc) - timedelta(minutes=5)
+        for block_id, pending_edit in list(self.pending_edits.items()):
+            is_seen = block_id in self.seen_block_ids
+            edited_time = parse_time(pending_edit.last_edited_time)
+            if not is_seen or edited_time < window_start:
+                del self.pending_edits[block_id]
+                self.cycle_stats.add("Dropped pending edits")
+
+    def iter_changed_blocks(
+        self,
+        page_id: str,
+        include_subpages: bool,
+    ) -> Iterator[dict[str, Any]]:
+        # Pages are listed only when their last_edited_time has advanced,
+        # or when they hold subpages whose timestamps need to be refreshed
+        pages: deque[tuple[str, Optional[str]]] = deque([(page_id, None)])
+        while pages:
+            current_page_id, last_edited_time = pages.popleft()
+            is_changed = last_edited_time is None or (
+                self.page_watermarks.get(current_page_id) != last_edited_time
+            )
+            has_subpages = bool(self.listed_subpages.get(current_page_id))
+            if not is_changed and not (include_subpages and has_subpages):
+                self.cycle_stats.add("Skipped unchanged pages")
+                continue
+
+            subpage_ids: list[str] = []
+            page_blocks = self.notion_client.iter_blocks(
+                current_page_id,
+                False,
+                last_edited_time,
+            )
+            for block in page_blocks:
+                if block["type"] == "child_page":
+                    subpage_ids.append(block["id"])
+                    if include_subpages:
+                        pages.append((block["id"], block["last_edited_time"]))
+                    if (
+                        self.page_watermarks.get(block["id"])
+                        == block["last_edited_time"]
+                    ):
+                        continue
+                elif not is_changed:
+                    continue
+                yield block
+
+            self.listed_subpages[current_page_id] = subpage_ids
+            if last_edited_time is not None and is_settled(last_edited_time):
+                self.next_page_watermarks[current_page_id] = last_edited_time
+
+    @staticmethod
+    def is_translation_sibling(block: dict[str, Any]):
+        if block["type"] in INLINE_TYPES or block["type"] not in RICH_TEXT_TYPES:
+            return False
+        return COMPLETION_MARK in NotionClient.get_block_text(block)
+
+    def pair_translation_siblings(
+        self,
+        blocks: Iterator[dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
+        # Each block is held back until the next ones show
+        # whether it is followed by its translations
+        previous_block: Optional[dict[str, Any]] = None
+        for block in blocks:
+            if (
+                previous_block is not None
+                and previous_block["type"] not in INLINE_TYPES
+                and previous_block["type"] in RICH_TEXT_TYPES
+                and not self.is_translation_sibling(previous_block)
+                and self.is_translation_sibling(block)
+                and previous_block.get("parent") == block.get("parent")
+            ):
+                siblings = self.translation_siblings.setdefault(
+                    previous_block["id"], []
+                )
+                siblings.append(block)
+                continue
+            if previous_block is not None:
+                yield previous_block
+            previous_block = block
+        if previous_block is not None:
+            yield previous_block
+
+    def handle_page_block(
+        self,
+        page_id: str,
+        create_translation: bool,
+        source_text: Optional[str] = None,
+    ):
+        if source_text is None:
+            source_text = self.notion_client.get_title_text(page_id)
+        source_text = source_text.strip()
+
+        if create_translation:
+            # Translated titles only get the languages they are still missing
+            target_languages = self.get_missing_languages(source_text)
+            if not target_languages:
+                return None
+            source_title = source_text
+            if COMPLETION_MARK in source_text:
+                source_title = self.get_source_title(source_text)
+            if self.is_untranslatable(source_title):
+                return None
+            page_block = {
+                "id": page_id,
+                "type": "child_page",
+                "child_page": {"title": source_text},
+            }
+            return PendingTranslation(page_block, source_title, None, target_languages)
+
+        else:
+            if COMPLETION_MARK in source_text:
+                converted_text = self.get_source_title(source_text)
+                self.notion_client.update_title(page_id, converted_text)
+            return None
+
+    def handle_normal_block(
+        self,
+        block: dict[str, Any],
+        realtime: bool,
+        create_translation: bool,
+    ):
+        if realtime:
+            self.seen_block_ids.add(block["id"])
+            if not self.is_recently_edited(block):
+                self.pending_edits.pop(block["id"], None)
+                return None
+            if self.block_watermarks.get(block["id"]) == block["last_edited_time"]:
+                self.cycle_stats.add("Skipped unchanged blocks")
+                return None
+
+        source_text = self.notion_client.get_block_text(block)
+        source_text = source_text.strip()
+
+        if source_text == "":
+            return None
+
+        if realtime:
+            if not self.is_debounced(block, source_text):
+                return None
+            last_edited_time = block["last_edited_time"]
+            if is_settled(last_edited_time):
+                self.next_block_watermarks[block["id"]] = last_edited_time
+
+        if create_translation and self.is_untranslatable(source_text):
+            return None
+
+        if block["type"] in INLINE_TYPES:
+            if create_translation:
+                # Translations for missing languages are added after the others
+                target_languages = self.get_missing_languages(source_text)
+                if not target_languages:
+                    return None
+                inline_source_text = source_text.split(COMPLETION_MARK)[0].strip()
+                if inline_source_text != source_text and self.is_untranslatable(
+                    inline_source_text
+                ):
+                    return None
+                return PendingTranslation(
+                    block, inline_source_text, None, target_languages
+                )
+            else:
+                if COMPLETION_MARK in source_text:
+                    rich_text = block[block["type"]]["rich_text"]
+                    for turn, item in enumerate(rich_text):
+                        if COMPLETION_MARK in item["plain_text"]:
+                            rich_text = rich_text[:turn]
+                            break
+                    self.notion_client.update_rich_text(
+                        block["id"],
+                        block["type"],
+                        NotionClient.get_minimal_rich_text(rich_text),
+                    )
+                return None
+
+        elif self.translation_layout == "sibling":
+            return self.handle_sibling_block(block, source_text, create_translation)
+
+        else:
+            if (
+                create_translation
+                and self.translation_state is not None
+                and len(self.target_languages) == 1
+            ):
+                pending = self.resolve_translation_state(block, source_text)
+                if pending is not False:
+                    return pending
+
+            if self.plan_children_listing(block):
+                children = self.notion_client.get_blocks(
+                    block["id"],
+                    False,
+                    block["last_edited_time"],
+                )
+            else:
+                children = []
+
+            if create_translation:
+                translation_children = [
+                    child
+                    for child in children
+                    if COMPLETION_MARK in self.notion_client.get_block_text(child)
+                ]
+                pending = self.plan_translation(
+                    block,
+                    source_text,
+                    translation_children,
+                )
+                if (
+                    pending is None
+                    and self.translation_state is not None
+                    and len(self.target_languages) == 1
+                ):
+                    # The up-to-date translation child is remembered for next time
+                    target_language = self.target_languages[0]
+                    for child in translation_children:
+                        child_text = self.notion_client.get_block_text(child)
+                        child_language, _ = self.parse_translation_text(child_text)
+                        if child_language == target_language:
+                            self.translation_state.put(
+                                block["id"],
+                                target_language,
+                                source_text,
+                                block["last_edited_time"],
+                                child["id"],
+                                child["type"],
+                                child_text.split(COMPLETION_MARK)[0].strip(),
+                            )
+                            break
+                return pending
+            else:
+                for child in children:
+                    child_text = self.notion_client.get_block_text(child)
+                    if COMPLETION_MARK in child_text:
+                        print(f"{child_text}\n")
+                        self.notion_client.delete_block(child["id"])
+                if self.translation_state is not None:
+                    self.translation_state.delete(block["id"])
+                return None
+
+    def handle_sibling_block(
+        self,
+        block: dict[str, Any],
+        source_text: str,
+        create_translation: bool,
+    ):
+        translation_siblings = self.translation_siblings.pop(block["id"], [])
+
+        if COMPLETION_MARK in source_text:
+            # This is a translation whose source block is gone
+            if not create_translation:
+                print(f"{source_text}\n")
+                self.notion_client.delete_block(block["id"])
+            return None
+
+        if create_translation:
+            return self.plan_translation(block, source_text, translation_siblings)
+        else:
+            for translation_sibling in translation_siblings:
+                print(f"{self.notion_client.get_block_text(translation_sibling)}\n")
+                self.notion_client.delete_block(translation_sibling["id"])
+            return None
+
+    def resolve_translation_state(self, block: dict[str, Any], source_text: str):
+        # Returns False when the store can't answer and markers must be read
+        assert self.translation_state is not None
+        target_language = self.target_languages[0]
+        state = self.translation_state.get(block["id"], target_language)
+        if state is None:
+            return False
+        if not block.get("has_children", True):
+            # The remembered translation child was removed in the meantime
+            self.translation_state.delete(block["id"], target_language)
+            return False
+        (
+            source_hash,
+            block_edited_time,
+            translation_block_id,
+            translation_block_type,
+            _,
+        ) = state
+        if source_hash == self.translation_state.get_text_hash(source_text):
+            # An unchanged source is only trusted while the block itself is
+            # untouched, since removing its translation child also edits it
+            if block_edited_time != block["last_edited_time"] or not (
+                is_settled(block_edited_time)
+            ):
+                return False
+            self.cycle_stats.add("Skipped by translation state")
+            return None
+        self.cycle_stats.add("Updated from translation state")
+        before_translation_child = {
+            "id": translation_block_id,
+            "type": translation_block_type,
+        }
+        return PendingTranslation(
+            block,
+            source_text,
+            {target_language: before_translation_child},
+            self.target_languages,
+        )
+
+    @staticmethod
+    def split_into_chunks(text: str) -> tuple[list[str], list[str]]:
+        # Packs whole sentences into chunks, keeping the whitespace
+        # between chunks so that translations can be joined back
+        sentences: list[tuple[str, str]] = []
+        position = 0
+        for match in SENTENCE_BOUNDARY.finditer(text):
+            sentences.append((text[position : match.start()], match.group()))
+            position = match.end()
+        sentences.append((text[position:], ""))
+
+        chunks: list[str] = []
+        separators: list[str] = []
+        chunk = ""
+        separator = ""
+        for sentence, next_separator in sentences:
+            if chunk and len(chunk) + len(separator) + len(sentence) > MAX_CHUNK_LENGTH:
+                chunks.append(chunk)
+                separators.append(separator)
+                chunk = sentence
+            else:
+                chunk += separator + sentence
+            separator = next_separator
+        chunks.append(chunk)
+        separators.append(separator)
+        return chunks, separators
+
+    def translate_deduplicated(
+        self,
+        texts: list[str],
+        target_language: str,
+    ) -> list[str]:
+        text_keys = [
+            (target_language, TranslationMemory.get_text_hash(text)) for text in texts
+        ]
+        unique_texts: dict[tuple[str, str], str] = {}
+        for text, text_key in zip(texts, text_keys):
+            if text_key not in self.cycle_translations:
+                unique_texts.setdefault(text_key, text)
+
+        # Long texts go out as several sentence chunks, which are
+        # translated side by side instead of as one slow segment
+        chunked_texts = [self.split_into_chunks(t) for t in unique_texts.values()]
+        chunks = [chunk for text_chunks, _ in chunked_texts for chunk in text_chunks]
+        chunk_translations = iter(
+            self.translate_client.translate_many(
+                chunks,
+                self.source_language,
+                target_language,
+            )
+        )
+        translations: list[str] = []
+        for text_chunks, separators in chunked_texts:
+            if len(text_chunks) > 1:
+                self.cycle_stats.add("Chunked long texts")
+            translation = ""
+            for separator in separators:
+                translation += next(chunk_translations) + separator
+            translations.append(translation)
+        self.cycle_translations.update(zip(unique_texts.keys(), translations))
+        self.cycle_stats.add("Source segments", len(texts))
+        self.cycle_stats.add("Unique source segments", len(unique_texts))
+        return [self.cycle_translations[text_key] for text_key in text_keys]
+
+    def write_translation(self, pending: PendingTranslation):
+        block = pending.block
+        source_text = pending.source_text
+        # Untagged markers kept next to new languages get the first language,
+        # which they were taken for
+        legacy_mark_text = f" {COMPLETION_MARK} "
+        first_mark_text = self.get_mark_text(self.target_languages[0])
+
+        if block["type"] == "child_page":
+            # Each translation is followed by its marker, and the source
+            # title always comes last, so new languages go in front
+            converted_text = ""
+            for target_language in reversed(pending.target_languages):
+                converted_text += pending.translations[target_language]
+                converted_text += self.get_mark_text(target_language)
+            current_title = block.get("child_page", {}).get("title", source_text)
+            converted_text += current_title.replace(legacy_mark_text, first_mark_text)
+            self.notion_client.update_title(block["id"], converted_text)
+
+        elif block["type"] in INLINE_TYPES:
+            rich_text = NotionClient.get_minimal_rich_text(
+                block[block["type"]]["rich_text"]
+            )
+            for turn, item in enumerate(rich_text):
+                if item.get("text", {}).get("content") == legacy_mark_text:
+                    rich_text[turn] = {
+                        "type": "text",
+                        "text": {"content": first_mark_text},
+                    }
+            for target_language in pending.target_languages:
+                mark_text = self.get_mark_text(target_language)
+                rich_text += [
+                    {
+                        "type": "text",
+                        "text": {"content": mark_text},
+                    },
+                ]
+                rich_text += NotionClient.build_rich_text(
+                    pending.translations[target_language]
+                )
+            self.notion_client.update_rich_text(block["id"], block["type"], rich_text)
+
+        else:
+            translation_block_ids: dict[str, str] = {}
+            new_target_languages: list[str] = []
+            new_translation_children: list[dict[str, Any]] = []
+            for target_language in pending.target_languages:
+                mark_text = self.get_mark_text(target_language)
+                mark_text += f"{len(source_text):04}"
+                final_text = pending.translations[target_language] + mark_text
+                final_rich_text = NotionClient.build_rich_text(final_text)
+
+                before_translation_child = pending.before_translation_children.get(
+                    target_language
+                )
+                if before_translation_child is not None:
+                    response = self.notion_client.update_rich_text(
+                        before_translation_child["id"],
+                        before_translation_child["type"],
+                        final_rich_text,
+                    )
+                    if response.get("object") != "error":
+                        translation_block_ids[target_language] = response["id"]
+                        continue
+                    # The known translation block is gone, so a new one is made
+                new_target_languages.append(target_language)
+                new_translation_children.append(
+                    self.notion_client.build_block(block, final_rich_text)
+                )
+
+            # Translations in every language are created in a single request
+            if new_translation_children:
+                if self.translation_layout == "sibling":
+                    parent = block["parent"]
+                    payload = {
+                        "children": new_translation_children,
+                        "after": block["id"],
+                    }
+                    response = self.notion_client.append_block_children(
+                        parent[parent["type"]], payload
+                    )
+                else:
+                    payload = {"children": new_translation_children}
+                    response = self.notion_client.append_block_children(
+                        block["id"], payload
+                    )
+                if response.get("object") == "error":
+                    return
+                for target_language, result in zip(
+                    new_target_languages, response["results"]
+                ):
+                    translation_block_ids[target_language] = result["id"]
+
+            target_language = self.target_languages[0]
+            if (
+                self.translation_state is not None
+                and self.translation_layout == "child"
+                and len(self.target_languages) == 1
+                and target_language in translation_block_ids
+            ):
+                self.translation_state.put(
+                    block["id"],
+                    target_language,
+                    source_text,
+                    block["last_edited_time"],
+                    translation_block_ids[target_language],
+                    block["type"],
+                    pending.translations[target_language],
+                )
+
+    def convert_page(
+        self,
+        page_id: str,
+        include_subpages: bool,
+        realtime: bool,
+        create_translation: bool,
+    ):
+        task_start_time = datetime.now(timezone.utc)
+        self.cycle_stats.reset()
+        self.next_page_watermarks = {}
+        self.next_block_watermarks = {}
+        self.seen_block_ids = set()
+        self.translation_siblings = {}
+        self.cycle_translations = {}
+
+        if realtime:
+            page_blocks = self.iter_changed_blocks(page_id, include_subpages)
+        elif self.notion_client.block_mirror is not None:
+            # The root timestamp decides whether its listing can be mirrored
+            root_page = self.notion_client.get_page(page_id)
+            page_blocks = self.notion_client.iter_blocks(
+                page_id,
+                include_subpages,
+                root_page.get("last_edited_time"),
+            )
+        else:
+            page_blocks = self.notion_client.iter_blocks(page_id, include_subpages)
+        if self.translation_layout == "sibling":
+            page_blocks = self.pair_translation_siblings(page_blocks)
+        block_count = 0
+
+        # Long one-off passes keep a checkpoint, so that a failed run can
+        # resume without handling finished blocks and their children again
+        checkpoint = None
+        if self.checkpoint_path is not None and create_translation and not realtime:
+            checkpoint = ConversionCheckpoint(
+                self.checkpoint_path,
+                page_id,
+                self.source_language,
+                self.target_languages,
+                self.translation_layout,
+            )
+
+        def fetch_blocks(blocks: list[dict[str, Any]]):
+            for block in blocks:
+                if checkpoint is not None and checkpoint.is_processed(block["id"]):
+                    self.cycle_stats.add("Skipped by checkpoint")
+                    continue
+                if block["type"] == "child_page":
+                    pending = self.handle_page_block(
+                        block["id"],
+                        create_translation,
+                        self.notion_client.get_listed_title(block),
+                    )
+                else:
+                    pending = self.handle_normal_block(
+                        block,
+                        realtime,
+                        create_translation,
+                    )
+                if pending is not None:
+                    translation_stage.put(pending)
+                elif checkpoint is not None:
+                    checkpoint.mark_processed(block["id"])
+
+        def translate_pendings(pendings: list[PendingTranslation]):
+            # Each target language gets its own batched translation requests
+            for target_language in self.target_languages:
+                language_pendings = [
+                    p for p in pendings if target_language in p.target_languages
+                ]
+                if not language_pendings:
+                    continue
+                translations = self.translate_deduplicated(
+                    [p.source_text for p in language_pendings],
+                    target_language,
+                )
+                for pending, translated in zip(language_pendings, translations):
+                    pending.translations[target_language] = translated
+            for pending in pendings:
+                if checkpoint is not None:
+                    checkpoint.add_pending_write(pending)
+                write_stage.put(pending)
+
+        def write_translations(pendings: list[PendingTranslation]):
+            for pending in pendings:
+                self.write_translation(pending)
+                if checkpoint is not None:
+                    checkpoint.mark_processed(pending.block["id"])
+
+        # Reading, translating and writing run as separate stages connected
+        # by bounded queues, so a slow stage never idles the others
+        write_stage = PipelineStage(
+            "Write",
+            write_translations,
+            self.write_worker_count,
+        )
+        translation_stage = PipelineStage(
+            "Translation",
+            translate_pendings,
+            self.translation_worker_count,
+            MAX_TRANSLATION_SEGMENTS,
+            TRANSLATION_BATCH_WAIT,
+        )
+        fetch_stage = PipelineStage(
+            "Fetch",
+            fetch_blocks,
+            self.fetch_worker_count,
+        )
+        stages = (fetch_stage, translation_stage, write_stage)
+
+        try:
+            if checkpoint is not None:
+                for pending in checkpoint.get_pending_writes():
+                    write_stage.put(pending)
+            if checkpoint is None or not checkpoint.is_processed(page_id):
+                pending = self.handle_page_block(page_id, create_translation)
+                if pending is not None:
+                    translation_stage.put(pending)
+                elif checkpoint is not None:
+                    checkpoint.mark_processed(page_id)
+            for block in page_blocks:
+                block_count += 1
+                fetch_stage.put(block)
+        finally:
+            for stage in stages:
+                stage.close()
+            if checkpoint is not None:
+                checkpoint.save()
+
+        print(f"Found {block_count} blocks\n")
+        for stage in stages:
+            stage.print_stats()
+        print("")
+        for stage in stages:
+            if stage.error is not None:
+                raise stage.error
+        if checkpoint is not None:
+            checkpoint.delete()
+
+        # Watermarks only advance once the whole cycle has succeeded, and
+        # pages with blocks still under editing must be listed again
+        if realtime:
+            self.prune_pending_edits()
+        for pending_edit in self.pending_edits.values():
+            self.next_page_watermarks.pop(pending_edit.page_id, None)
+        self.page_watermarks.update(self.next_page_watermarks)
+        self.block_watermarks.update(self.next_block_watermarks)
+
+        duration = datetime.now(timezone.utc) - task_start_time
+        duration_seconds = duration.total_seconds()
+
+        # Shared clients also count for other pages, so their daemon reports them
+        if not self.is_notion_client_shared:
+            notion_client = self.notion_client
+            skipped_write_count = notion_client.write_suppressor.pop_skipped_count()
+            if skipped_write_count:
+                self.cycle_stats.add("Skipped no-op writes", skipped_write_count)
+        if not self.is_translate_client_shared:
+            coalesced_count = self.translate_client.pop_coalesced_count()
+            if coalesced_count:
+                self.cycle_stats.add("Coalesced translation requests", coalesced_count)
+        self.cycle_stats.print_stats()
+        segment_count = self.cycle_stats.get("Source segments")
+        if segment_count:
+            duplicate_count = segment_count - self.cycle_stats.get(
+                "Unique source segments"
+            )
+            dedupe_ratio = duplicate_count / segment_count
+            print(
+                f"Deduplicated {duplicate_count} of {segment_count} source segments"
+                f" ({dedupe_ratio:.1%})\n"
+            )
+        translation_memory = self.translate_client.translation_memory
+        if translation_memory is not None and not self.is_translate_client_shared:
+            translation_memory.print_stats()
+        block_mirror = self.notion_client.block_mirror
+        if block_mirror is not None and not self.is_notion_client_shared:
+            block_mirror.print_stats()
+        print(f"Conversion cycle took {duration_seconds} seconds\n")
+
+        return translation_stage.processed_count + len(self.pending_edits)
+
+    def find_removals(self, block: dict[str, Any]) -> list[PendingRemoval]:
+        if block["type"] == "child_page":
+            title = self.notion_client.get_listed_title(block)
+            if title is None:
+                title = self.notion_client.get_title_text(block["id"])
+            if COMPLETION_MARK not in title:
+                return []
+            converted_text = self.get_source_title(title)
+            return [PendingRemoval(block["id"], title=converted_text)]
+
+        source_text = self.notion_client.get_block_text(block)
+        if COMPLETION_MARK not in source_text and not block.get("has_children"):
+            return []
+
+        if block["type"] in INLINE_TYPES:
+            if COMPLETION_MARK not in source_text:
+                return []
+            rich_text = block[block["type"]]["rich_text"]
+            for turn, item in enumerate(rich_text):
+                if COMPLETION_MARK in item["plain_text"]:
+                    rich_text = rich_text[:turn]
+                    break
+            minimal_rich_text = NotionClient.get_minimal_rich_text(rich_text)
+            return [PendingRemoval(block["id"], block["type"], minimal_rich_text)]
+
+        if self.translation_layout == "sibling":
+            if self.is_translation_sibling(block):
+                return [PendingRemoval(block["id"])]
+            return []
+
+        if block["type"] not in RICH_TEXT_TYPES or not block.get("has_children"):
+            return []
+        removals: list[PendingRemoval] = []
+        children = self.notion_client.iter_blocks(
+            block["id"],
+            False,
+            block["last_edited_time"],
+        )
+        for child in children:
+            if COMPLETION_MARK in self.notion_client.get_block_text(child):
+                removals.append(PendingRemoval(child["id"]))
+        if self.translation_state is not None:
+            self.translation_state.delete(block["id"])
+        return removals
+
+    def apply_removal(self, removal: PendingRemoval, removal_count: int):
+        if removal.title is not None:
+            self.notion_client.update_title(removal.block_id, removal.title)
+            self.cycle_stats.add("Rewritten titles")
+        elif removal.rich_text is not None and removal.block_type is not None:
+            self.notion_client.update_rich_text(
+                removal.block_id,
+                removal.block_type,
+                removal.rich_text,
+            )
+            self.cycle_stats.add("Rewritten headings")
+        else:
+            self.notion_client.delete_block(removal.block_id)
+            self.cycle_stats.add("Deleted translation blocks")
+        applied_count = self.cycle_stats.add("Applied removals")
+        if applied_count % REMOVAL_PROGRESS_INTERVAL == 0:
+            print(f"Applied {applied_count} of {removal_count} removals\n")
 
+    def remove_translations(self, page_id: str, include_subpages: bool):
+        # Marker-bearing blocks are all discovered in a single traversal
+        # first, so that deletions never shift a listing still being paged
+        task_start_time = time.monotonic()
+        self.cycle_stats.reset()
+        removals: list[PendingRemoval] = []
 
-class TranslatorClient:
-    def __init__(self, google_cloud_api_key: str):
+        def discover_removals(blocks: list[dict[str, Any]]):
+            for block in blocks:
+                removals.extend(self.find_removals(block))
+
+        discovery_stage = PipelineStage(
+            "Discovery",
+            discover_removals,
+            self.fetch_worker_count,
+        )
+        try:
+            title = self.notion_client.get_title_text(page_id)
+            root_block = {
+                "id": page_id,
+                "type": "child_page",
+                "child_page": {"title": title},
+            }
+            discovery_stage.put(root_block)
+            for block in self.notion_client.iter_blocks(page_id, include_subpages):
+                discovery_stage.put(block)
+        finally:
+            discovery_stage.close()
+        discovery_stage.print_stats()
+        if discovery_stage.error is not None:
+            raise discovery_stage.error
+
+        def apply_removals(some_removals: list[PendingRemoval]):
+            for removal in some_removals:
+                self.apply_removal(removal, len(removals))
+
+        removal_stage = PipelineStage(
+            "Removal",
+            apply_removals,
+            self.write_worker_count,
+        )
+        try:
+            for removal in removals:
+                removal_stage.put(removal)
+        finally:
+            removal_stage.close()
+        removal_stage.print_stats()
+        print("")
+        if removal_stage.error is not None:
+            raise removal_stage.error
+
+        duration_seconds = time.monotonic() - task_start_time
+        deleted_count = self.cycle_stats.get("Deleted translation blocks")
+        rewritten_count = self.cycle_stats.get("Rewritten titles")
+        rewritten_count += self.cycle_stats.get("Rewritten headings")
+        print(
+            f"Deleted {deleted_count} blocks and rewrote {rewritten_count} texts"
+            f" in {duration_seconds:.1f} seconds\n"
+        )
+        return deleted_count + rewritten_count
+
+
+class RootPage:
+    def __init__(
+        self,
+        page_id: str,
+        converter: Converter,
+        include_subpages: bool,
+        realtime: bool,
+        scheduler: PollingScheduler,
+    ):
+        self.page_id = page_id
+        self.converter = converter
+        self.include_subpages = include_subpages
+        self.realtime = realtime
+        self.scheduler = scheduler
+
+    def run_cycle(self):
+        print(f"Converting page {self.page_id}\n")
+        cycle_start_time = time.monotonic()
+        change_count = self.converter.convert_page(
+            self.page_id,
+            self.include_subpages,
+            self.realtime,
+            True,
+        )
+        return change_count, time.monotonic() - cycle_start_time
+
+
+class RootPageDaemon:
+    def __init__(
+        self,
+        root_pages: list[RootPage],
+        worker_count: int = DEFAULT_ROOT_WORKER_COUNT,
+        notion_client: Optional[NotionClient] = None,
+        translate_client: Optional[TranslatorClient] = None,
+    ):
+        self.root_pages = root_pages
+        self.worker_count = worker_count
+        self.notion_client = notion_client
+        self.translate_client = translate_client
+
+    def print_client_stats(self):
+        # Clients shared by every page are reported here instead of
+        # in the cycle of whichever page happened to finish
+        if self.notion_client is not None:
+            skipped_write_count = (
+                self.notion_client.write_suppressor.pop_skipped_count()
+            )
+            if skipped_write_count:
+                print(f"Skipped no-op writes across pages: {skipped_write_count}\n")
+            if self.notion_client.block_mirror is not None:
+                self.notion_client.block_mirror.print_stats()
+        if self.translate_client is not None:
+            coalesced_count = self.translate_client.pop_coalesced_count()
+            if coalesced_count:
+                print(
+                    f"Coalesced translation requests across pages: {coalesced_count}\n"
+                )
+            if self.translate_client.translation_memory is not None:
+                self.translate_client.translation_memory.print_stats()
+
+    def run(self):
+        # The page that has been due the longest always runs next, and a page
+        # never runs twice at once, so no page can starve the others
+        due_pages = [(time.monotonic(), i) for i in range(len(self.root_pages))]
+        heapq.heapify(due_pages)
+        running: dict[Future[tuple[int, float]], int] = {}
+        with ThreadPoolExecutor(self.worker_count) as executor:
+            while due_pages or running:
+                while (
+                    due_pages
+                    and due_pages[0][0] <= time.monotonic()
+                    and len(running) < self.worker_count
+                ):
+                    _, index = heapq.heappop(due_pages)
+                    root_page = self.root_pages[index]
+                    running[executor.submit(root_page.run_cycle)] = index
+
+                timeout = None
+                if due_pages and len(running) < self.worker_count:
+                    timeout = max(0.0, due_pages[0][0] - time.monotonic())
+                if not running:
+                    time.sleep(timeout or 0.0)
+                    continue
+                done, _ = wait(running, timeout, FIRST_COMPLETED)
+
+                for future in done:
+                    index = running.pop(future)
+                    root_page = self.root_pages[index]
+                    is_failed = False
+                    try:
+                        change_count, cycle_seconds = future.result()
+                    except Exception as error:
+                        # A failing page waits as long as an idle one, and
+                        # one-off pages resume from their checkpoints
+                        print(f"Converting page {root_page.page_id} failed: {error}\n")
+                        change_count, cycle_seconds = 0, 0.0
+                        is_failed = True
+                    if not root_page.realtime and not is_failed:
+                        continue
+                    delay = root_page.scheduler.get_delay(
+                        change_count > 0,
+                        cycle_seconds,
+                    )
+                    print(f"Next cycle of {root_page.page_id} in {delay:.1f} seconds\n")
+                    heapq.heappush(due_pages, (time.monotonic() + delay, index))
+                if done:
+                    self.print_client_stats()
+
+
+class AsyncTranslatorClient:
+    def __init__(
+        self,
+        google_cloud_api_key: str,
+        translation_memory: Optional[TranslationMemory] = None,
+        concurrency: int = ASYNC_CONCURRENCY,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
         self.default_headers = {
             "Content-type": "application/json",
         }
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
 
-        self.session = requests.Session()
-        self.session.headers.update(self.default_headers)
-        retry = Retry(
-            total=20,
-            backoff_factor=1,
-            status_forcelist=[429],
-            allowed_methods=ALLOWED_HTTP_METHODS,
-        )
-        self.session.mount("http://", HTTPAdapter(max_retries=retry))
-        self.session.mount("https://", HTTPAdapter(max_retries=retry))
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(GOOGLE_REQUESTS_PER_SECOND, GOOGLE_BURST_SIZE)
+        self.rate_limiter = rate_limiter
 
         self.google_cloud_api_key = google_cloud_api_key
+        self.translation_memory = translation_memory
 
-    def translate(
+    async def send(self, method: str, url: str, **kwargs: Any) -> tuple[int, Any]:
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(
+                headers=self.default_headers,
+                connector=connector,
+            )
+        return await send_async(
+            self.session,
+            self.semaphore,
+            self.rate_limiter,
+            method,
+            url,
+            **kwargs,
+        )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def translate(
         self,
         text: str,
         source_language: Optional[str],
         target_language: Optional[str],
     ):
+        translations = await self.translate_many(
+            [text],
+            source_language,
+            target_language,
+        )
+        return translations[0]
+
+    async def translate_many(
+        self,
+        texts: list[str],
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ) -> list[str]:
+        if self.translation_memory is None:
+            remembered: list[Optional[str]] = [None] * len(texts)
+        else:
+            remembered = self.translation_memory.get_many(
+                texts,
+                source_language,
+                target_language,
+            )
+        missing_texts = [t for t, r in zip(texts, remembered) if r is None]
+
+        # Every batch is in flight at the same time
+        batches = TranslatorClient.split_into_batches(missing_texts)
+        batch_translations = await asyncio.gather(
+            *(
+                self.translate_batch(batch, source_language, target_language)
+                for batch in batches
+            )
+        )
+        fetched = [t for translations in batch_translations for t in translations]
+        if self.translation_memory is not None and missing_texts:
+            self.translation_memory.put_many(
+                missing_texts,
+                fetched,
+                source_language,
+                target_language,
+            )
+
+        fetched_iterator = iter(fetched)
+        translations: list[str] = []
+        for translation in remembered:
+            if translation is None:
+                translation = next(fetched_iterator)
+            translations.append(translation)
+        return translations
+
+    async def translate_batch(
+        self,
+        texts: list[str],
+        source_language: Optional[str],
+        target_language: Optional[str],
+    ) -> list[str]:
         url = "https://translation.googleapis.com/language/translate/v2"
 
         # Specify Query Parameters
@@ -72,63 +2602,99 @@ class TranslatorClient:
         }
 
         body = {
-            "q": [text],
+            "q": texts,
             "source": source_language,
             "target": target_language,
         }
 
-        # Send the request and get response
-        raw_response = self.session.post(url, params=params, json=body)
-        try:
-            response = raw_response.json()
-        except Exception:
-            print(raw_response.request.headers)
-            print(text)
-            print(raw_response.content)
+        status, response = await self.send("POST", url, params=params, json=body)
+        if response is None:
+            print(texts)
             raise ConnectionError
 
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['error']['details']}\n")
-
-        translation = response["data"]["translations"][0]["translatedText"]
-        print(f"{text}\n")
-        print(f"{translation}\n")
+        if status != 200:
+            if len(texts) > 1:
+                middle = len(texts) // 2
+                first_half, second_half = await asyncio.gather(
+                    self.translate_batch(
+                        texts[:middle], source_language, target_language
+                    ),
+                    self.translate_batch(
+                        texts[middle:], source_language, target_language
+                    ),
+                )
+                return first_half + second_half
+            print(f"HTTP {status}: {response['error']['details']}\n")
 
-        # Return the translation
-        return translation
+        translations: list[str] = []
+        for text, item in zip(texts, response["data"]["translations"]):
+            translation: str = item["translatedText"]
+            print(f"{text}\n")
+            print(f"{translation}\n")
+            translations.append(translation)
+        return translations
 
 
-class NotionClient:
-    def __init__(self, notion_api_key: str):
+class AsyncNotionClient:
+    def __init__(
+        self,
+        notion_api_key: str,
+        concurrency: int = ASYNC_CONCURRENCY,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
         self.default_headers = {
             "Authorization": f"Bearer {notion_api_key}",
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28",
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.default_headers)
-        retry = Retry(
-            total=20,
-            backoff_factor=1,
-            status_forcelist=[429],
-            allowed_methods=ALLOWED_HTTP_METHODS,
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(NOTION_REQUESTS_PER_SECOND, NOTION_BURST_SIZE)
+        self.rate_limiter = rate_limiter
+        self.write_suppressor = WriteSuppressor()
+
+    async def send(self, method: str, url: str, **kwargs: Any) -> tuple[int, Any]:
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(
+                headers=self.default_headers,
+                connector=connector,
+            )
+        status, response = await send_async(
+            self.session,
+            self.semaphore,
+            self.rate_limiter,
+            method,
+            url,
+            **kwargs,
         )
-        self.session.mount("http://", HTTPAdapter(max_retries=retry))
-        self.session.mount("https://", HTTPAdapter(max_retries=retry))
+        if response is None:
+            print(f"HTTP {status}: The response is not JSON\n")
+            raise ConnectionError
+        if status != 200:
+            print(f"HTTP {status}: {response['message']}\n")
+        return status, response
 
-    def get_property(self, page_id: str, property_id: str):
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_property(self, page_id: str, property_id: str):
         url = f"https://api.notion.com/v1/pages/{page_id}/properties/{property_id}"
-        raw_response = self.session.get(url)
-        response = raw_response.json()
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        _, response = await self.send("GET", url)
         return response
 
-    def get_title_text(self, page_id: str):
-        title_property = self.get_property(page_id, "title")["results"][0]
-        return title_property["title"]["plain_text"]
+    async def get_title_text(self, page_id: str) -> str:
+        title_property = (await self.get_property(page_id, "title"))["results"][0]
+        title = title_property["title"]["plain_text"]
+        self.write_suppressor.remember_title(page_id, title)
+        return title
 
-    def get_some_blocks(
+    async def get_some_blocks(
         self,
         block_id: str,
         start_cursor: Optional[str] = None,
@@ -140,219 +2706,302 @@ class NotionClient:
             params["start_cursor"] = start_cursor
         if page_size is not None:
             params["page_size"] = page_size
-        raw_response = self.session.get(url, params=params)
-        response = raw_response.json()
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        _, response = await self.send("GET", url, params=params)
         return response
 
-    def get_blocks(self, block_id: str, include_subpages: bool) -> list[Any]:
-        blocks_response = self.get_some_blocks(block_id)
+    async def get_blocks(self, block_id: str, include_subpages: bool) -> list[Any]:
+        blocks_response = await self.get_some_blocks(block_id)
         blocks = blocks_response.get("results")
         if blocks is None:
             return []
         while blocks_response.get("has_more"):
-            blocks_response = self.get_some_blocks(
+            blocks_response = await self.get_some_blocks(
                 block_id, blocks_response.get("next_cursor")
             )
             blocks.extend(blocks_response.get("results"))
         for block in blocks:
-            if block["type"] == "child_page":
-                if include_subpages:
-                    blocks.extend(self.get_blocks(block["id"], include_subpages))
-        print(f"Found {len(blocks)} blocks\n")
+            self.write_suppressor.remember_block(block)
+        if include_subpages:
+            # Sibling subpages are listed at the same time
+            subpage_blocks = await asyncio.gather(
+                *(
+                    self.get_blocks(block["id"], include_subpages)
+                    for block in blocks
+                    if block["type"] == "child_page"
+                )
+            )
+            for some_blocks in subpage_blocks:
+                blocks.extend(some_blocks)
         return blocks
 
-    def get_text(self, rich_text_object: dict[str, Any]):
-        # Concatenates a rich text array into plain text
-        text = ""
-        for rt in rich_text_object["rich_text"]:
-            text += rt["plain_text"]
-        return text
-
-    def get_block_text(self, block: dict[str, Any]):
-        if block["type"] in RICH_TEXT_TYPES:
-            return self.get_text(block[block["type"]])
-        else:
-            return ""
+    async def update_rich_text(
+        self,
+        block_id: str,
+        block_type: str,
+        rich_text: list[dict[str, Any]],
+    ):
+        if self.write_suppressor.is_rich_text_known(block_id, block_type, rich_text):
+            return
+        payload = {block_type: {"rich_text": rich_text}}
+        await self.update_block(block_id, payload)
 
-    def update_block(self, block_id: str, payload: dict[str, Any]):
+    async def update_block(self, block_id: str, payload: dict[str, Any]):
         url = f"https://api.notion.com/v1/blocks/{block_id}"
-        raw_response = self.session.patch(url, json=payload)
-        response = raw_response.json()
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        status, response = await self.send("PATCH", url, json=payload)
+        if status != 200:
+            self.write_suppressor.forget(block_id)
+        else:
+            self.write_suppressor.remember_block(response)
 
-    def delete_block(self, block_id: str):
+    async def delete_block(self, block_id: str):
+        self.write_suppressor.forget(block_id)
         url = f"https://api.notion.com/v1/blocks/{block_id}"
-        raw_response = self.session.delete(url)
-        response = raw_response.json()
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        await self.send("DELETE", url)
 
-    def append_block_children(self, block_id: str, payload: dict[str, Any]):
+    async def append_block_children(self, block_id: str, payload: dict[str, Any]):
         url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-        raw_response = self.session.patch(url, json=payload)
-        response = raw_response.json()
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        _, response = await self.send("PATCH", url, json=payload)
+        for block in response.get("results", []):
+            self.write_suppressor.remember_block(block)
 
-    def update_title(self, page_id: str, title: str):
+    async def update_title(self, page_id: str, title: str):
+        if self.write_suppressor.is_title_known(page_id, title):
+            return
         url = f"https://api.notion.com/v1/pages/{page_id}"
         payload = {
-            "properties": {
-                "title": {"title": [{"type": "text", "text": {"content": title}}]}
-            }
+            "properties": {"title": {"title": NotionClient.build_rich_text(title)}}
         }
-        raw_response = self.session.patch(url, json=payload)
-        response = raw_response.json()
-        if raw_response.status_code != 200:
-            print(f"HTTP {raw_response.status_code}: {response['message']}\n")
+        status, _ = await self.send("PATCH", url, json=payload)
+        if status != 200:
+            self.write_suppressor.forget(page_id)
+        else:
+            self.write_suppressor.remember_title(page_id, title)
 
 
-class Converter:
+async def send_async(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    rate_limiter: RateLimiter,
+    method: str,
+    url: str,
+    **kwargs: Any,
+) -> tuple[int, Any]:
+    # Mirrors the blocking clients: connection errors back off exponentially
+    # and rate limited responses wait for Retry-After on the shared limiter
+    for retry_count in range(MAX_RETRIES + 1):
+        backoff_seconds = min(2**retry_count, MAX_BACKOFF_SECONDS)
+        await rate_limiter.acquire_async()
+        try:
+            async with semaphore:
+                async with session.request(method, url, **kwargs) as raw_response:
+                    status = raw_response.status
+                    retry_after = raw_response.headers.get("Retry-After")
+                    try:
+                        response = await raw_response.json(content_type=None)
+                    except ValueError:
+                        response = None
+        except aiohttp.ClientConnectionError:
+            if retry_count == MAX_RETRIES:
+                raise
+            await asyncio.sleep(backoff_seconds)
+            continue
+        if status != 429 or retry_count == MAX_RETRIES:
+            return status, response
+        rate_limiter.pause(get_retry_seconds(retry_after))
+    raise ConnectionError
+
+
+class AsyncConverter:
     def __init__(
         self,
         source_language: Optional[str],
         target_language: Optional[str],
         google_cloud_api_key: str,
         notion_api_key: str,
+        translation_memory_path: Optional[str] = None,
+        concurrency: int = ASYNC_CONCURRENCY,
     ):
-        self.notion_client = NotionClient(notion_api_key)
-        self.translate_client = TranslatorClient(google_cloud_api_key)
+        if translation_memory_path is None:
+            translation_memory = None
+        else:
+            translation_memory = TranslationMemory(translation_memory_path)
+        self.notion_client = AsyncNotionClient(notion_api_key, concurrency)
+        self.translate_client = AsyncTranslatorClient(
+            google_cloud_api_key,
+            translation_memory,
+            concurrency,
+        )
         self.source_language = source_language
         self.target_language = target_language
+        self.cycle_stats = CycleStats()
 
-    def handle_page_block(self, page_id: str, create_translation: bool):
-        source_text = self.notion_client.get_title_text(page_id)
+    async def handle_page_block(
+        self,
+        page_id: str,
+        create_translation: bool,
+        source_text: Optional[str] = None,
+    ):
+        if source_text is None:
+            source_text = await self.notion_client.get_title_text(page_id)
         source_text = source_text.strip()
-        division_text = f" {COMPLETION_MARK} "
 
         if create_translation:
             if COMPLETION_MARK in source_text:
-                return source_text
-
-            converted_text = self.translate_client.translate(
-                source_text,
-                self.source_language,
-                self.target_language,
-            )
-            converted_text = f"{converted_text}{division_text}{source_text}"
-
-            self.notion_client.update_title(page_id, converted_text)
+                return None
+            page_block = {"id": page_id, "type": "child_page"}
+            return PendingTranslation(page_block, source_text)
 
         else:
             if COMPLETION_MARK in source_text:
-                converted_text = source_text.split(COMPLETION_MARK)[1].strip()
-                self.notion_client.update_title(page_id, converted_text)
+                converted_text = Converter.get_source_title(source_text)
+                await self.notion_client.update_title(page_id, converted_text)
+            return None
 
-    def handle_normal_block(
+    async def handle_normal_block(
         self,
         block: dict[str, Any],
         realtime: bool,
         create_translation: bool,
     ):
-        if realtime:
-            time_format = "%Y-%m-%dT%H:%M:%S.000Z"
-            last_edited_time = datetime.strptime(block["last_edited_time"], time_format)
-            last_edited_time = last_edited_time.replace(tzinfo=timezone.utc)
-            if last_edited_time + timedelta(minutes=5) < datetime.now(timezone.utc):
-                return
+        if realtime and not Converter.is_recently_edited(block):
+            return None
 
-        source_text = self.notion_client.get_block_text(block)
+        source_text = NotionClient.get_block_text(block)
         source_text = source_text.strip()
 
         if source_text == "":
-            return
+            return None
 
         if block["type"] in INLINE_TYPES:
             if create_translation:
                 if COMPLETION_MARK in source_text:
-                    return
-                mark_text = f" {COMPLETION_MARK} "
-                translated = self.translate_client.translate(
-                    source_text,
-                    self.source_language,
-                    self.target_language,
-                )
-                block[block["type"]]["rich_text"] += [
-                    {
-                        "type": "text",
-                        "text": {"content": mark_text},
-                    },
-                    {
-                        "type": "text",
-                        "text": {"content": translated},
-                    },
-                ]
-                self.notion_client.update_block(block["id"], block)
+                    return None
+                return PendingTranslation(block, source_text)
             else:
                 if COMPLETION_MARK in source_text:
-                    for turn, item in enumerate(block[block["type"]]["rich_text"]):
-                        if COMPLETION_MARK in item["text"]["content"]:
-                            originals = block[block["type"]]["rich_text"]
-                            block[block["type"]]["rich_text"] = originals[:turn]
-                    self.notion_client.update_block(block["id"], block)
+                    rich_text = block[block["type"]]["rich_text"]
+                    for turn, item in enumerate(rich_text):
+                        if COMPLETION_MARK in item["plain_text"]:
+                            rich_text = rich_text[:turn]
+                            break
+                    await self.notion_client.update_rich_text(
+                        block["id"],
+                        block["type"],
+                        NotionClient.get_minimal_rich_text(rich_text),
+                    )
+                return None
 
+        if block.get("has_children", True):
+            children = await self.notion_client.get_blocks(block["id"], False)
         else:
-            mark_text = f" {COMPLETION_MARK} {len(source_text):04}"
+            self.cycle_stats.add("Skipped children listings")
+            children = []
 
+        if create_translation:
+            # Translations in other languages are left alone, and an untagged
+            # one is only reused when this language has no tagged translation
+            target_language = self.target_language or ""
             before_translation_child = None
-            before_source_text_length = 0
-            children = self.notion_client.get_blocks(block["id"], False)
+            before_source_text_length = None
+            legacy_translation_child = None
+            extra_children: list[dict[str, Any]] = []
+            for child in children:
+                child_text = NotionClient.get_block_text(child)
+                if COMPLETION_MARK not in child_text:
+                    continue
+                child_language, source_text_length = Converter.parse_translation_text(
+                    child_text
+                )
+                if child_language is None:
+                    if legacy_translation_child is None:
+                        legacy_translation_child = child
+                elif child_language != target_language:
+                    continue
+                elif before_translation_child is None:
+                    before_translation_child = child
+                    before_source_text_length = source_text_length
+                else:
+                    extra_children.append(child)
+            await asyncio.gather(
+                *(self.notion_client.delete_block(c["id"]) for c in extra_children)
+            )
+            if before_source_text_length == len(source_text):
+                return None
+            if before_translation_child is None:
+                before_translation_child = legacy_translation_child
 
-            if create_translation:
-                for child in children:
-                    child_text = self.notion_client.get_block_text(child)
-                    if COMPLETION_MARK in child_text:
-                        if before_translation_child is None:
-                            before_translation_child = child
-                            splitted_texts = child_text.split(COMPLETION_MARK)
-                            before_source_text_length = int(splitted_texts[-1].strip())
-                        else:
-                            self.notion_client.delete_block(child["id"])
+            before_translation_children: dict[str, dict[str, Any]] = {}
+            if before_translation_child is not None:
+                before_translation_children[target_language] = before_translation_child
+            return PendingTranslation(
+                block,
+                source_text,
+                before_translation_children,
+                [target_language],
+            )
+        else:
+            translation_children: list[dict[str, Any]] = []
+            for child in children:
+                child_text = NotionClient.get_block_text(child)
+                if COMPLETION_MARK in child_text:
+                    print(f"{child_text}\n")
+                    translation_children.append(child)
+            await asyncio.gather(
+                *(
+                    self.notion_client.delete_block(c["id"])
+                    for c in translation_children
+                )
+            )
+            return None
 
-                if before_translation_child is not None:
-                    if len(source_text) == before_source_text_length:
-                        return
+    async def write_translation(self, pending: PendingTranslation, translated: str):
+        block = pending.block
+        source_text = pending.source_text
 
-                if before_translation_child is not None:
-                    new_translation_child = before_translation_child
-                else:
-                    new_translation_child = copy.deepcopy(block)
+        target_language = self.target_language or ""
+        if block["type"] == "child_page":
+            division_text = Converter.get_mark_text(target_language)
+            converted_text = f"{translated}{division_text}{source_text}"
+            await self.notion_client.update_title(block["id"], converted_text)
 
-                translated = self.translate_client.translate(
-                    source_text,
-                    self.source_language,
-                    self.target_language,
-                )
-                maximum_content_length = MAX_TEXT_LENGTH - len(mark_text)
-                if len(translated) > maximum_content_length:
-                    translated = translated[:maximum_content_length]
-                final_text = translated + mark_text
-                new_translation_child[new_translation_child["type"]]["rich_text"] = [
-                    {
-                        "type": "text",
-                        "text": {"content": final_text},
-                    },
-                ]
+        elif block["type"] in INLINE_TYPES:
+            mark_text = Converter.get_mark_text(target_language)
+            rich_text = NotionClient.get_minimal_rich_text(
+                block[block["type"]]["rich_text"]
+            )
+            rich_text += [
+                {
+                    "type": "text",
+                    "text": {"content": mark_text},
+                },
+            ]
+            rich_text += NotionClient.build_rich_text(translated)
+            await self.notion_client.update_rich_text(
+                block["id"], block["type"], rich_text
+            )
 
-                if before_translation_child is not None:
-                    payload = new_translation_child
-                    self.notion_client.update_block(
-                        before_translation_child["id"], payload
-                    )
-                else:
-                    payload = {"children": [new_translation_child]}
-                    self.notion_client.append_block_children(block["id"], payload)
+        else:
+            mark_text = Converter.get_mark_text(target_language)
+            mark_text += f"{len(source_text):04}"
+            before_translation_child = pending.before_translation_children.get(
+                target_language
+            )
+
+            final_text = translated + mark_text
+            final_rich_text = NotionClient.build_rich_text(final_text)
+
+            if before_translation_child is not None:
+                await self.notion_client.update_rich_text(
+                    before_translation_child["id"],
+                    before_translation_child["type"],
+                    final_rich_text,
+                )
             else:
-                for child in children:
-                    child_text = self.notion_client.get_block_text(child)
-                    if COMPLETION_MARK in child_text:
-                        print(f"{child_text}\n")
-                        self.notion_client.delete_block(child["id"])
+                new_translation_child = NotionClient.build_block(block, final_rich_text)
+                payload = {"children": [new_translation_child]}
+                await self.notion_client.append_block_children(block["id"], payload)
 
-    def convert_page(
+    async def convert_page(
         self,
         page_id: str,
         include_subpages: bool,
@@ -360,31 +3009,71 @@ class Converter:
         create_translation: bool,
     ):
         task_start_time = datetime.now(timezone.utc)
+        self.cycle_stats.reset()
 
-        page_blocks = self.notion_client.get_blocks(page_id, include_subpages)
-
-        self.handle_page_block(page_id, create_translation)
+        page_blocks = await self.notion_client.get_blocks(page_id, include_subpages)
+        print(f"Found {len(page_blocks)} blocks\n")
 
-        for block in page_blocks:
+        async def handle_block(block: dict[str, Any]):
             if block["type"] == "child_page":
-                self.handle_page_block(block["id"], create_translation)
+                return await self.handle_page_block(
+                    block["id"],
+                    create_translation,
+                    NotionClient.get_listed_title(block),
+                )
             else:
-                self.handle_normal_block(block, realtime, create_translation)
+                return await self.handle_normal_block(
+                    block,
+                    realtime,
+                    create_translation,
+                )
+
+        # Every block is handled at once, bounded only by the client semaphores
+        handled = await asyncio.gather(
+            self.handle_page_block(page_id, create_translation),
+            *(handle_block(block) for block in page_blocks),
+        )
+        pendings = [pending for pending in handled if pending is not None]
+
+        translations = await self.translate_client.translate_many(
+            [p.source_text for p in pendings],
+            self.source_language,
+            self.target_language,
+        )
+        await asyncio.gather(
+            *(
+                self.write_translation(pending, translated)
+                for pending, translated in zip(pendings, translations)
+            )
+        )
 
         duration = datetime.now(timezone.utc) - task_start_time
         duration_seconds = duration.total_seconds()
 
+        skipped_write_count = self.notion_client.write_suppressor.pop_skipped_count()
+        if skipped_write_count:
+            self.cycle_stats.add("Skipped no-op writes", skipped_write_count)
+        self.cycle_stats.print_stats()
+        if self.translate_client.translation_memory is not None:
+            self.translate_client.translation_memory.print_stats()
         print(f"Conversion cycle took {duration_seconds} seconds\n")
 
+        return len(pendings)
+
+    async def close(self):
+        await self.notion_client.close()
+        await self.translate_client.close()
+
 
 if __name__ == "__main__":
-    note_path = f"{pathlib.Path(__file__).parent.resolve()}/note.json"
+    note_folder = pathlib.Path(__file__).parent.resolve()
+    note_path = f"{note_folder}/note.json"
 
     try:
         with open(note_path, "r", encoding="utf8") as file:
             note = json.load(file)
     except FileNotFoundError:
-        note: dict[str, str] = {}
+        note: dict[str, Any] = {}
 
     is_note_modified = False
     if "googleCloudApiKey" not in note.keys():
@@ -402,51 +3091,197 @@ if __name__ == "__main__":
 
     google_cloud_api_key = note["googleCloudApiKey"]
     notion_api_key = note["notionApiKey"]
+    translation_memory_path = note.get(
+        "translationMemoryPath",
+        f"{note_folder}/translation_memory.sqlite3",
+    )
+    fetch_worker_count = int(note.get("fetchWorkerCount", DEFAULT_WORKER_COUNT))
+    translation_worker_count = int(
+        note.get("translationWorkerCount", DEFAULT_TRANSLATION_WORKER_COUNT)
+    )
+    write_worker_count = int(note.get("writeWorkerCount", DEFAULT_WORKER_COUNT))
+    max_polling_interval = float(note.get("maxPollingInterval", MAX_POLLING_INTERVAL))
+    debounce_seconds = float(note.get("debounceSeconds", DEFAULT_DEBOUNCE_SECONDS))
+    block_mirror_path = note.get(
+        "blockMirrorPath",
+        f"{note_folder}/block_mirror.sqlite3",
+    )
+    translation_state_path = note.get(
+        "translationStatePath",
+        f"{note_folder}/translation_state.sqlite3",
+    )
+    translation_layout = note.get("translationLayout", DEFAULT_TRANSLATION_LAYOUT)
+    checkpoint_path = note.get("checkpointPath", f"{note_folder}/checkpoint.json")
+
+    root_page_notes = note.get("rootPages")
+    if root_page_notes:
+        # Every listed page is converted in this one process over shared clients
+        root_worker_count = int(note.get("rootWorkerCount", DEFAULT_ROOT_WORKER_COUNT))
+        shared_notion_client = NotionClient(
+            notion_api_key,
+            (fetch_worker_count + write_worker_count) * root_worker_count,
+            block_mirror=BlockMirror(block_mirror_path),
+        )
+        shared_translate_client = TranslatorClient(
+            google_cloud_api_key,
+            TranslationMemory(translation_memory_path),
+            translation_worker_count * root_worker_count,
+        )
+        root_pages: list[RootPage] = []
+        for root_page_note in root_page_notes:
+            root_page_id = str(root_page_note["url"]).split("/")[-1].split("-")[-1]
+            target_languages = root_page_note["targetLanguages"]
+            converter = Converter(
+                root_page_note.get("sourceLanguage"),
+                target_languages[0],
+                google_cloud_api_key,
+                notion_api_key,
+                translation_memory_path,
+                fetch_worker_count,
+                translation_worker_count,
+                write_worker_count,
+                debounce_seconds,
+                block_mirror_path,
+                translation_state_path,
+                translation_layout,
+                target_languages[1:],
+                shared_notion_client,
+                shared_translate_client,
+                str(
+                    pathlib.Path(checkpoint_path).with_name(
+                        f"checkpoint_{root_page_id}.json"
+                    )
+                ),
+            )
+            root_page = RootPage(
+                root_page_id,
+                converter,
+                bool(root_page_note.get("includeSubpages", True)),
+                bool(root_page_note.get("realtime", True)),
+                PollingScheduler(maximum_interval=max_polling_interval),
+            )
+            root_pages.append(root_page)
+        RootPageDaemon(
+            root_pages,
+            root_worker_count,
+            shared_notion_client,
+            shared_translate_client,
+        ).run()
 
-    answer = input("\nEnter the Notion page URL\n")
-    root_page_id = str(answer).split("/")[-1].split("-")[-1]
-    answer = input("\nWill you create translations, or remove them? (c/r)\n")
-    create_translation = True if str(answer).lower().strip() == "c" else False
-
-    source_language: Optional[str]
-    target_language: Optional[str]
-    if create_translation:
-        answer = input("\nEnter the source language for translation (en/ko/ru/jp...)\n")
-        source_language = str(answer).lower().strip()
-        answer = input("\nEnter the target language for translation (en/ko/ru/jp...)\n")
-        target_language = str(answer).lower().strip()
-        answer = input("\nShould this translate in realtime and keep running? (y/n)\n")
-        realtime = True if str(answer).lower().strip() == "y" else False
     else:
-        source_language = None
-        target_language = None
-        realtime = False
+        answer = input("\nEnter the Notion page URL\n")
+        root_page_id = str(answer).split("/")[-1].split("-")[-1]
+        answer = input("\nWill you create translations, or remove them? (c/r)\n")
+        create_translation = True if str(answer).lower().strip() == "c" else False
+
+        source_language: Optional[str]
+        target_language: Optional[str]
+        if create_translation:
+            answer = input(
+                "\nEnter the source language for translation (en/ko/ru/jp...)\n"
+            )
+            source_language = str(answer).lower().strip()
+            answer = input(
+                "\nEnter the target languages for translation,"
+                " separated by commas (en/ko/ru/jp...)\n"
+            )
+            target_languages = [
+                language.strip()
+                for language in str(answer).lower().split(",")
+                if language.strip()
+            ]
+            target_language = target_languages[0]
+            additional_target_languages = target_languages[1:]
+            answer = input(
+                "\nShould this translate in realtime and keep running? (y/n)\n"
+            )
+            realtime = True if str(answer).lower().strip() == "y" else False
+        else:
+            source_language = None
+            target_language = None
+            additional_target_languages = []
+            realtime = False
 
-    answer = input("\nWill you include subpages? (y/n)\n")
-    include_subpages = True if str(answer).lower().strip() == "y" else False
+        answer = input("\nWill you include subpages? (y/n)\n")
+        include_subpages = True if str(answer).lower().strip() == "y" else False
 
-    print("")
+        print("")
 
-    converter = Converter(
-        source_language,
-        target_language,
-        google_cloud_api_key,
-        notion_api_key,
-    )
+        if note.get("useAsyncio"):
+            # The asyncio converter writes one language as translation children
+            if additional_target_languages or translation_layout != "child":
+                raise ValueError(
+                    "useAsyncio supports only a single target language"
+                    " and the child translation layout"
+                )
+            async_converter = AsyncConverter(
+                source_language,
+                target_language,
+                google_cloud_api_key,
+                notion_api_key,
+                translation_memory_path,
+            )
 
-    if realtime:
-        while True:
-            converter.convert_page(
-                root_page_id,
-                include_subpages,
-                realtime,
-                create_translation,
+            async def run_async_converter():
+                scheduler = PollingScheduler(maximum_interval=max_polling_interval)
+                try:
+                    while True:
+                        cycle_start_time = time.monotonic()
+                        change_count = await async_converter.convert_page(
+                            root_page_id,
+                            include_subpages,
+                            realtime,
+                            create_translation,
+                        )
+                        if not realtime:
+                            break
+                        cycle_seconds = time.monotonic() - cycle_start_time
+                        delay = scheduler.get_delay(change_count > 0, cycle_seconds)
+                        print(f"Next cycle in {delay:.1f} seconds\n")
+                        await asyncio.sleep(delay)
+                finally:
+                    await async_converter.close()
+
+            asyncio.run(run_async_converter())
+
+        else:
+            converter = Converter(
+                source_language,
+                target_language,
+                google_cloud_api_key,
+                notion_api_key,
+                translation_memory_path,
+                fetch_worker_count,
+                translation_worker_count,
+                write_worker_count,
+                debounce_seconds,
+                block_mirror_path,
+                translation_state_path,
+                translation_layout,
+                additional_target_languages,
+                checkpoint_path=checkpoint_path,
             )
-            time.sleep(30)
-    else:
-        converter.convert_page(
-            root_page_id,
-            include_subpages,
-            realtime,
-            create_translation,
-        )
+
+            if not create_translation:
+                converter.remove_translations(root_page_id, include_subpages)
+            elif realtime:
+                scheduler = PollingScheduler(maximum_interval=max_polling_interval)
+                while True:
+                    cycle_start_time = time.monotonic()
+                    change_count = converter.convert_page(
+                        root_page_id,
+                        include_subpages,
+                        realtime,
+                        create_translation,
+                    )
+                    cycle_seconds = time.monotonic() - cycle_start_time
+                    delay = scheduler.get_delay(change_count > 0, cycle_seconds)
+                    print(f"Next cycle in {delay:.1f} seconds\n")
+                    time.sleep(delay)
+            else:
+                converter.convert_page(
+                    root_page_id,
+                    include_subpages,
+                    realtime,
+                    create_translation,
+                )
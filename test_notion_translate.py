@@ -0,0 +1,59 @@
+from typing import Optional
+
+import pytest
+
+from notion_translate import Converter, get_retry_seconds
+
+UNTRANSLATABLE_CASES = [
+    # Texts that come back unchanged whatever the languages
+    ("en", "ko", "2024-01-31", True),
+    ("en", "ko", "https://example.com/page", True),
+    ("en", "ko", "someone@example.com", True),
+    ("en", "ko", "foo_bar", True),
+    ("en", "ko", "os.path.join()", True),
+    ("en", "ko", "getValue", True),
+    ("en", "ko", "config.yaml", True),
+    # Sentence punctuation never makes a word look like code
+    ("en", "ko", "Summary.", False),
+    ("en", "ko", "Thanks.", False),
+    ("en", "ko", "Hello world.", False),
+    # Text already in the target script of a known source in another script
+    ("en", "ko", "안녕하세요", True),
+    ("ko", "en", "Hello world", True),
+    ("ko", "ja", "漢字かな", True),
+    # Shared or unknown scripts can't tell whether text is translated
+    ("fr", "en", "Bonjour le monde", False),
+    ("zh", "ja", "汉字", False),
+    (None, "en", "Bonjour le monde", False),
+    (None, "ja", "漢字", False),
+    (None, "ko", "안녕하세요", False),
+]
+
+RETRY_AFTER_CASES = [
+    (None, 1.0),
+    ("", 1.0),
+    ("3", 3.0),
+    ("0.5", 0.5),
+    ("-2", 0.0),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ("soon", 1.0),
+]
+
+
+@pytest.mark.parametrize(
+    ("source_language", "target_language", "text", "expected"),
+    UNTRANSLATABLE_CASES,
+)
+def test_is_untranslatable(
+    source_language: Optional[str],
+    target_language: str,
+    text: str,
+    expected: bool,
+):
+    converter = Converter(source_language, target_language, "", "")
+    assert converter.is_untranslatable(text) == expected
+
+
+@pytest.mark.parametrize(("retry_after", "expected"), RETRY_AFTER_CASES)
+def test_get_retry_seconds(retry_after: Optional[str], expected: float):
+    assert get_retry_seconds(retry_after) == expected